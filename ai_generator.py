@@ -3,27 +3,187 @@ OpenAI Content Generator
 Uses OpenAI API to generate blog post content from prompts
 """
 import os
-from openai import OpenAI
-from typing import Optional, Dict
+import asyncio
+import atexit
+import json
+import threading
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from typing import Optional, Dict, List, Awaitable, Iterator, TypeVar
 import logging
 
+from llm_cache import LLMCache, SemanticCache, shared_cache, shared_semantic_cache
+from rate_limiter import RateLimiter, estimate_tokens, shared_rate_limiter
+
+T = TypeVar('T')
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_lock = threading.Lock()
+
+# HTTP/2 lets concurrent completions and embeddings multiplex over a couple of connections
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0)
+_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+
+
+def _shared_http_client() -> httpx.Client:
+    """Connection pool shared by every sync OpenAI client in the process"""
+    global _http_client
+    with _async_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                transport=httpx.HTTPTransport(http2=True, retries=2, limits=_HTTP_LIMITS),
+                timeout=_HTTP_TIMEOUT
+            )
+        return _http_client
+
+
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """Connection pool shared by every AsyncOpenAI client in the process"""
+    global _async_http_client
+    with _async_lock:
+        if _async_http_client is None:
+            # Pool settings go on the transport: httpx ignores Client(limits=, http2=) when a transport is given
+            _async_http_client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(http2=True, retries=2, limits=_HTTP_LIMITS),
+                timeout=_HTTP_TIMEOUT
+            )
+        return _async_http_client
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine on the shared background event loop and wait for the result
+    
+    All async OpenAI calls run on this one loop so the pooled connections in
+    the shared httpx client stay valid between (synchronous) Flask requests.
+    """
+    global _async_loop
+    with _async_lock:
+        if _async_loop is None:
+            _async_loop = asyncio.new_event_loop()
+            threading.Thread(target=_async_loop.run_forever, name='openai-async', daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _async_loop).result()
+
+
+@atexit.register
+def _close_http_clients() -> None:
+    """Close pooled connections cleanly on interpreter exit"""
+    if _http_client is not None:
+        _http_client.close()
+    if _async_http_client is not None and _async_loop is not None:
+        run_async(_async_http_client.aclose())
+
 
 class AIContentGenerator:
     """Generate blog post content using OpenAI"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    _IMAGE_PROMPT_SYSTEM = "You are an expert at creating detailed, visually descriptive prompts for AI image generation. Create prompts that are suitable for blog post featured images - professional, clean, and relevant to the content."
+    
+    _LENGTH_GUIDE = {
+        "short": "approximately 500-700 words",
+        "medium": "approximately 1000-1500 words",
+        "long": "approximately 2000-3000 words"
+    }
+    _DEFAULT_LENGTH = "approximately 1000-1500 words"
+    
+    # System prompt templates, assembled once; only {tone} and {word_count} vary per call
+    _SYSTEM_PROMPT_HEAD = """You are an expert blog post writer. Generate high-quality, engaging blog posts in Markdown format with YAML frontmatter.
+
+Writing Style:
+- Tone: {tone}
+- Length: {word_count}
+- Use clear headings (##, ###) for structure
+- Include bullet points and lists where appropriate
+- Write engaging introductions and conclusions
+- Use examples and explanations
+
+Format Requirements:
+1. Start with YAML frontmatter between --- markers
+2. Include these frontmatter fields:
+   - title: Compelling, SEO-friendly title
+   - excerpt: 1-2 sentence summary
+   - categories: Array of 2-3 relevant categories
+   - tags: Array of 5-7 relevant tags
+   - status: draft"""
+    _SYSTEM_PROMPT_SEO_FIELDS = """
+   - seo_title: SEO-optimized title (50-60 chars)
+   - seo_description: Meta description (150-160 chars)
+   - keywords: Comma-separated keywords
+   - focus_keyword: Primary keyword"""
+    _SYSTEM_PROMPT_TAIL = """
+
+3. After frontmatter, write the blog post in Markdown
+4. Use proper heading hierarchy (# for title, ## for sections, ### for subsections)
+5. Include code blocks with language tags if technical content
+6. Use **bold** and *italic* for emphasis
+
+Example structure:
+```
+---
+title: "Your Title Here"
+excerpt: "Brief summary"
+categories:
+  - Category1
+  - Category2
+tags: [tag1, tag2, tag3]
+status: draft
+---
+
+# Main Title
+
+Introduction paragraph...
+
+## Section 1
+
+Content...
+
+### Subsection
+
+More content...
+
+## Conclusion
+
+Wrap up...
+```
+
+Generate a complete, ready-to-publish blog post."""
+    _SYSTEM_PROMPT = _SYSTEM_PROMPT_HEAD + _SYSTEM_PROMPT_TAIL
+    _SYSTEM_PROMPT_SEO = _SYSTEM_PROMPT_HEAD + _SYSTEM_PROMPT_SEO_FIELDS + _SYSTEM_PROMPT_TAIL
+    
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[LLMCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 limiter: Optional[RateLimiter] = None):
         """
         Initialize OpenAI client
         
         Args:
             api_key: OpenAI API key (uses OPENAI_API_KEY env var if not provided)
+            cache: Response cache (uses the process-wide cache if not provided)
+            semantic_cache: Similarity cache for reworded prompts (uses the
+                process-wide one if OPENAI_SEMANTIC_CACHE_DIR is set)
+            limiter: RPM/TPM throttle (uses the process-wide one if not provided)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, http_client=_shared_http_client())
+        self.async_client = AsyncOpenAI(api_key=self.api_key, http_client=_shared_async_http_client())
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        # Cheapest model that does each job well; long posts get the larger model
+        self._model_routing = {
+            "image_prompt": os.getenv('OPENAI_MODEL_NANO', 'gpt-4.1-nano'),
+            "edit": os.getenv('OPENAI_MODEL_NANO', 'gpt-4.1-nano'),
+            "short": self.model,
+            "medium": self.model,
+            "long": os.getenv('OPENAI_MODEL_LARGE', 'gpt-4o')
+        }
+        self.embedding_model = os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
+        self.cache = cache if cache is not None else shared_cache()
+        self.semantic_cache = semantic_cache if semantic_cache is not None else shared_semantic_cache()
+        self.limiter = limiter if limiter is not None else shared_rate_limiter()
     
     def generate_blog_post(self, 
                           prompt: str,
@@ -53,22 +213,201 @@ class AIContentGenerator:
         user_prompt = self._build_user_prompt(prompt, categories, tags)
         
         try:
+            return self._complete(self._pick_model("blog_post", length), system_prompt, user_prompt,
+                                  temperature=0.7, max_tokens=4000, semantic_text=prompt)
+            
+        except Exception as e:
+            logging.error(f"OpenAI API error: {str(e)}")
+            raise
+    
+    def stream_blog_post(self,
+                         prompt: str,
+                         tone: str = "professional",
+                         length: str = "medium",
+                         include_seo: bool = True,
+                         categories: Optional[str] = None,
+                         tags: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate a blog post like generate_blog_post, yielding text as it arrives
+        
+        A cached response is yielded as a single chunk. The full text is
+        cached once the stream completes.
+        
+        Yields:
+            Markdown text fragments
+        """
+        system_prompt = self._build_system_prompt(tone, length, include_seo)
+        user_prompt = self._build_user_prompt(prompt, categories, tags)
+        
+        yield from self._stream_completion(self._pick_model("blog_post", length), system_prompt, user_prompt,
+                                           temperature=0.7, max_tokens=4000, semantic_text=prompt)
+    
+    def _stream_completion(self, model: str, system_prompt: str, user_prompt: str,
+                           temperature: float, max_tokens: int,
+                           semantic_text: Optional[str] = None) -> Iterator[str]:
+        """Streaming counterpart of _complete; caches the full text at the end"""
+        key, scope = self._cache_keys(model, system_prompt, user_prompt, temperature, max_tokens, semantic_text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        embedding = None
+        if semantic_text and self.semantic_cache is not None:
+            embedding = self._embed(semantic_text)
+            if embedding is not None:
+                similar = self.semantic_cache.get(embedding, scope)
+                if similar is not None:
+                    self.cache.set(key, similar)
+                    yield similar
+                    return
+        
+        parts = []
+        try:
+            self.limiter.acquire(estimate_tokens(model, system_prompt, user_prompt, max_tokens=max_tokens))
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.7,
-                max_tokens=4000
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
             )
             
-            content = response.choices[0].message.content
-            return content
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
             
         except Exception as e:
             logging.error(f"OpenAI API error: {str(e)}")
             raise
+        
+        self._store(key, scope, embedding, ''.join(parts))
+    
+    async def generate_blog_posts_batch(self,
+                                        prompts: List[str],
+                                        tone: str = "professional",
+                                        length: str = "medium",
+                                        include_seo: bool = True,
+                                        categories: Optional[str] = None,
+                                        tags: Optional[str] = None,
+                                        mode: str = "online",
+                                        concurrency: int = 20) -> List[str]:
+        """
+        Generate one blog post per prompt with shared settings
+        
+        Args:
+            prompts: Topics/requests, one post each
+            tone, length, include_seo, categories, tags: As for generate_blog_post
+            mode: 'online' runs concurrent requests; 'batch' submits to the
+                OpenAI Batch API (half the cost, results within 24h)
+            concurrency: Maximum in-flight requests in online mode
+            
+        Returns:
+            Markdown strings in the same order as prompts
+        """
+        model = self._pick_model("blog_post", length)
+        system_prompt = self._build_system_prompt(tone, length, include_seo)
+        user_prompts = [self._build_user_prompt(p, categories, tags) for p in prompts]
+        
+        if mode == "batch":
+            contents = await self._complete_via_batch_api(model, system_prompt, user_prompts,
+                                                          temperature=0.7, max_tokens=4000)
+            return contents
+        if mode != "online":
+            raise ValueError(f"Unknown batch mode: {mode}")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def one(prompt: str, user_prompt: str) -> str:
+            async with semaphore:
+                return await self._acomplete(model, system_prompt, user_prompt,
+                                             temperature=0.7, max_tokens=4000, semantic_text=prompt)
+        
+        try:
+            return list(await asyncio.gather(*(one(p, u) for p, u in zip(prompts, user_prompts))))
+        except Exception as e:
+            logging.error(f"OpenAI API error: {str(e)}")
+            raise
+    
+    async def _complete_via_batch_api(self, model: str, system_prompt: str, user_prompts: List[str],
+                                      temperature: float, max_tokens: int) -> List[str]:
+        """
+        Run chat completions through the OpenAI Batch API
+        
+        Cached prompts are answered directly; only the misses are submitted.
+        Polls with exponential backoff until the batch finishes.
+        """
+        results: List[Optional[str]] = [None] * len(user_prompts)
+        keys = []
+        lines = []
+        for i, user_prompt in enumerate(user_prompts):
+            key, scope = self._cache_keys(model, system_prompt, user_prompt, temperature, max_tokens)
+            keys.append((key, scope))
+            results[i] = self.cache.get(key)
+            if results[i] is None:
+                lines.append(json.dumps({
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model,
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        "temperature": temperature,
+                        "max_tokens": max_tokens
+                    }
+                }))
+        
+        if not lines:
+            return results
+        
+        batch_file = await self.async_client.files.create(
+            file=("blog-posts.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = await self.async_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        delay = 5.0
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300.0)
+            batch = await self.async_client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+        
+        output = await self.async_client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            i = int(entry["custom_id"])
+            response = entry.get("response") or {}
+            if response.get("status_code") != 200:
+                logging.error(f"OpenAI batch request {i} failed: {entry.get('error') or response}")
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[i] = content
+            key, scope = keys[i]
+            self._store(key, scope, None, content)
+        
+        missing = [i for i, content in enumerate(results) if content is None]
+        if missing:
+            raise RuntimeError(f"OpenAI batch {batch.id} returned no content for prompts {missing}")
+        return results
     
     def generate_image_prompt(self, post_content: str) -> str:
         """
@@ -81,104 +420,72 @@ class AIContentGenerator:
             Image generation prompt
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at creating detailed, visually descriptive prompts for AI image generation. Create prompts that are suitable for blog post featured images - professional, clean, and relevant to the content."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Based on this blog post, create a detailed image generation prompt for a featured image (max 100 words):\n\n{post_content[:1000]}"
-                    }
-                ],
+            content = self._complete(
+                self._pick_model("image_prompt"),
+                self._IMAGE_PROMPT_SYSTEM,
+                self._image_prompt_user(post_content),
                 temperature=0.8,
-                max_tokens=150
+                max_tokens=150,
+                semantic_text=post_content[:1000]
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
         except Exception as e:
             logging.error(f"OpenAI API error generating image prompt: {str(e)}")
             return "Professional blog post featured image, modern design, clean background"
     
-    def _build_system_prompt(self, tone: str, length: str, include_seo: bool) -> str:
-        """Build the system prompt based on settings"""
-        
-        length_guide = {
-            "short": "approximately 500-700 words",
-            "medium": "approximately 1000-1500 words",
-            "long": "approximately 2000-3000 words"
-        }
+    async def generate_blog_post_async(self,
+                                       prompt: str,
+                                       tone: str = "professional",
+                                       length: str = "medium",
+                                       include_seo: bool = True,
+                                       categories: Optional[str] = None,
+                                       tags: Optional[str] = None) -> str:
+        """
+        Async version of generate_blog_post using AsyncOpenAI
         
-        word_count = length_guide.get(length, "approximately 1000-1500 words")
+        Run it on the shared loop with run_async() from synchronous code.
+        """
+        system_prompt = self._build_system_prompt(tone, length, include_seo)
+        user_prompt = self._build_user_prompt(prompt, categories, tags)
         
-        prompt = f"""You are an expert blog post writer. Generate high-quality, engaging blog posts in Markdown format with YAML frontmatter.
-
-Writing Style:
-- Tone: {tone}
-- Length: {word_count}
-- Use clear headings (##, ###) for structure
-- Include bullet points and lists where appropriate
-- Write engaging introductions and conclusions
-- Use examples and explanations
-
-Format Requirements:
-1. Start with YAML frontmatter between --- markers
-2. Include these frontmatter fields:
-   - title: Compelling, SEO-friendly title
-   - excerpt: 1-2 sentence summary
-   - categories: Array of 2-3 relevant categories
-   - tags: Array of 5-7 relevant tags
-   - status: draft"""
-
-        if include_seo:
-            prompt += """
-   - seo_title: SEO-optimized title (50-60 chars)
-   - seo_description: Meta description (150-160 chars)
-   - keywords: Comma-separated keywords
-   - focus_keyword: Primary keyword"""
-
-        prompt += """
-
-3. After frontmatter, write the blog post in Markdown
-4. Use proper heading hierarchy (# for title, ## for sections, ### for subsections)
-5. Include code blocks with language tags if technical content
-6. Use **bold** and *italic* for emphasis
-
-Example structure:
-```
----
-title: "Your Title Here"
-excerpt: "Brief summary"
-categories:
-  - Category1
-  - Category2
-tags: [tag1, tag2, tag3]
-status: draft
----
-
-# Main Title
-
-Introduction paragraph...
-
-## Section 1
-
-Content...
-
-### Subsection
-
-More content...
-
-## Conclusion
-
-Wrap up...
-```
-
-Generate a complete, ready-to-publish blog post."""
-
-        return prompt
+        try:
+            return await self._acomplete(self._pick_model("blog_post", length), system_prompt, user_prompt,
+                                         temperature=0.7, max_tokens=4000, semantic_text=prompt)
+            
+        except Exception as e:
+            logging.error(f"OpenAI API error: {str(e)}")
+            raise
+    
+    async def generate_image_prompt_async(self, post_content: str) -> str:
+        """Async version of generate_image_prompt using AsyncOpenAI"""
+        try:
+            content = await self._acomplete(
+                self._pick_model("image_prompt"),
+                self._IMAGE_PROMPT_SYSTEM,
+                self._image_prompt_user(post_content),
+                temperature=0.8,
+                max_tokens=150,
+                semantic_text=post_content[:1000]
+            )
+            
+            return content.strip()
+            
+        except Exception as e:
+            logging.error(f"OpenAI API error generating image prompt: {str(e)}")
+            return "Professional blog post featured image, modern design, clean background"
+    
+    def _build_system_prompt(self, tone: str, length: str, include_seo: bool) -> str:
+        """Build the system prompt based on settings"""
+        template = self._SYSTEM_PROMPT_SEO if include_seo else self._SYSTEM_PROMPT
+        word_count = self._LENGTH_GUIDE.get(length, self._DEFAULT_LENGTH)
+        return template.format(tone=tone, word_count=word_count)
+    
+    @staticmethod
+    def _image_prompt_user(post_content: str) -> str:
+        """Build the user prompt for featured image prompt generation"""
+        return f"Based on this blog post, create a detailed image generation prompt for a featured image (max 100 words):\n\n{post_content[:1000]}"
     
     def _build_user_prompt(self, prompt: str, categories: Optional[str], tags: Optional[str]) -> str:
         """Build the user prompt with additional context"""
@@ -206,24 +513,155 @@ Generate a complete, ready-to-publish blog post."""
             Enhanced markdown content
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert blog post editor. Modify the content according to the user's instructions while maintaining markdown format and frontmatter."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Instruction: {instruction}\n\nCurrent content:\n{content}"
-                    }
-                ],
+            return self._complete(
+                self._pick_model("edit"),
+                "You are an expert blog post editor. Modify the content according to the user's instructions while maintaining markdown format and frontmatter.",
+                f"Instruction: {instruction}\n\nCurrent content:\n{content}",
                 temperature=0.7,
                 max_tokens=4000
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logging.error(f"OpenAI API error: {str(e)}")
             raise
+    
+    def _pick_model(self, task: str, length: Optional[str] = None) -> str:
+        """
+        Choose the model for a task
+        
+        Args:
+            task: 'blog_post', 'image_prompt' or 'edit'
+            length: Post length tier for blog posts (short, medium, long)
+        """
+        if task == "blog_post":
+            return self._model_routing.get(length, self.model)
+        return self._model_routing.get(task, self.model)
+    
+    def _cache_keys(self, model: str, system_prompt: str, user_prompt: str,
+                    temperature: float, max_tokens: int, semantic_text: Optional[str] = None) -> tuple:
+        """
+        Return (exact cache key, semantic cache scope) for a request
+        
+        The scope covers everything except semantic_text: the rest of the
+        user prompt (e.g. suggested categories and tags) must match exactly.
+        """
+        key = LLMCache.make_key(
+            model=model,
+            system=system_prompt,
+            user=user_prompt,
+            t=temperature,
+            max=max_tokens
+        )
+        scope = LLMCache.make_key(
+            model=model,
+            system=system_prompt,
+            user=user_prompt.replace(semantic_text, '', 1) if semantic_text else '',
+            t=temperature,
+            max=max_tokens
+        )
+        return key, scope
+    
+    def _complete(self, model: str, system_prompt: str, user_prompt: str,
+                  temperature: float, max_tokens: int, semantic_text: Optional[str] = None) -> str:
+        """
+        Run a chat completion, serving identical requests from the cache
+        
+        Args:
+            model: Model to run the completion on
+            system_prompt: System message content
+            user_prompt: User message content
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            semantic_text: The variable part of user_prompt (e.g. the topic); when
+                given, responses for similarly worded text are reused too
+            
+        Returns:
+            Completion text
+        """
+        key, scope = self._cache_keys(model, system_prompt, user_prompt, temperature, max_tokens, semantic_text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        embedding = None
+        if semantic_text and self.semantic_cache is not None:
+            embedding = self._embed(semantic_text)
+            if embedding is not None:
+                similar = self.semantic_cache.get(embedding, scope)
+                if similar is not None:
+                    self.cache.set(key, similar)
+                    return similar
+        
+        self.limiter.acquire(estimate_tokens(model, system_prompt, user_prompt, max_tokens=max_tokens))
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        
+        content = response.choices[0].message.content
+        self._store(key, scope, embedding, content)
+        return content
+    
+    async def _acomplete(self, model: str, system_prompt: str, user_prompt: str,
+                         temperature: float, max_tokens: int, semantic_text: Optional[str] = None) -> str:
+        """Async version of _complete using AsyncOpenAI"""
+        key, scope = self._cache_keys(model, system_prompt, user_prompt, temperature, max_tokens, semantic_text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        embedding = None
+        if semantic_text and self.semantic_cache is not None:
+            embedding = await self._aembed(semantic_text)
+            if embedding is not None:
+                similar = self.semantic_cache.get(embedding, scope)
+                if similar is not None:
+                    self.cache.set(key, similar)
+                    return similar
+        
+        estimated = estimate_tokens(model, system_prompt, user_prompt, max_tokens=max_tokens)
+        async with self.limiter.reserve(estimated):
+            response = await self.async_client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        
+        content = response.choices[0].message.content
+        self._store(key, scope, embedding, content)
+        return content
+    
+    def _store(self, key: str, scope: str, embedding: Optional[list], content: Optional[str]) -> None:
+        """Save a completion in the exact and (if embedded) semantic caches"""
+        if not content:
+            return
+        self.cache.set(key, content)
+        if embedding is not None:
+            self.semantic_cache.set(embedding, scope, content)
+    
+    def _embed(self, text: str) -> Optional[list]:
+        """Embed text for the semantic cache; None if the call fails"""
+        try:
+            response = self.client.embeddings.create(model=self.embedding_model, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            logging.warning(f"OpenAI embedding error, skipping semantic cache: {str(e)}")
+            return None
+    
+    async def _aembed(self, text: str) -> Optional[list]:
+        """Async version of _embed"""
+        try:
+            response = await self.async_client.embeddings.create(model=self.embedding_model, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            logging.warning(f"OpenAI embedding error, skipping semantic cache: {str(e)}")
+            return None
@@ -1,23 +1,50 @@
-from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for
+from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import requests 
 import logging
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from werkzeug.utils import secure_filename
 import os
 from pathlib import Path
 import tempfile
 import io
+import json
+import hashlib
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: faster jsonify
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Import our custom modules
-from wp_client import WordPressClient
+from wp_client import WordPressClient, RETRY_POLICY, elementor_text_layout
 from markdown_parser import MarkdownParser, create_sample_markdown
-from ai_generator import AIContentGenerator
+from ai_generator import AIContentGenerator, run_async
+from llm_cache import shared_cache, shared_semantic_cache
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify() backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max upload
 app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -25,10 +52,287 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-product
 # Allowed file extensions
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
 ALLOWED_MD_EXTENSIONS = {'md', 'markdown'}
+_IMG_SUFFIXES = tuple(f".{ext}" for ext in ALLOWED_IMAGE_EXTENSIONS)
+_MD_SUFFIXES = tuple(f".{ext}" for ext in ALLOWED_MD_EXTENSIONS)
+
+# The sample template never changes, so encode it (and its ETag) once
+_SAMPLE_MD_BYTES = create_sample_markdown().encode('utf-8')
+_SAMPLE_MD_ETAG = hashlib.md5(_SAMPLE_MD_BYTES).hexdigest()
+
+# Short-lived cache of /check_wp_cred responses, keyed by site, user and password hash
+_CRED_CACHE_TTL = 30
+_CRED_CACHE_MAX = 1000
+_CRED_CACHE = {}
+_CRED_CACHE_LOCK = threading.Lock()
+
+# Optional background queue for upload_post; without REDIS_URL uploads run in the request
+UPLOAD_QUEUE = None
+if os.getenv('REDIS_URL'):
+    from redis import Redis
+    from rq import Queue
+    UPLOAD_QUEUE = Queue('uploads', connection=Redis.from_url(os.getenv('REDIS_URL')))
+
+# Upper bound on prompts per /generate-ai/bulk request
+MAX_BULK_PROMPTS = 50
+
+# Shared HTTP session so keep-alive reuses TCP+TLS connections to WordPress across requests.
+# It serves every user, so cookies are never stored on it.
+SESSION = requests.Session()
+SESSION.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=100, max_retries=RETRY_POLICY)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Shared pools for fanning out WordPress calls (avoids per-request thread creation)
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='wp-upload')
+_TERM_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='wp-terms')
+
+# One AI generator per process, so its clients and caches stay warm across requests
+_AI_GEN = None
+_AI_GEN_LOCK = threading.Lock()
+
+# WordPress clients keyed by site, user and password hash
+_WP_CLIENT_MAX = 64
+_WP_CLIENTS = {}
+_WP_CLIENTS_LOCK = threading.Lock()
+
+
+def get_ai_gen():
+    """Return the shared AIContentGenerator, creating it on first use"""
+    global _AI_GEN
+    with _AI_GEN_LOCK:
+        if _AI_GEN is None:
+            _AI_GEN = AIContentGenerator()
+        return _AI_GEN
+
+
+def get_wp_client(site, username, password):
+    """Return a WordPressClient for these credentials, reusing recent ones"""
+    pwd_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    key = (site, username, pwd_hash)
+    with _WP_CLIENTS_LOCK:
+        client = _WP_CLIENTS.pop(key, None)
+        if client is None:
+            client = WordPressClient(site, username, password, session=SESSION)
+        _WP_CLIENTS[key] = client
+        while len(_WP_CLIENTS) > _WP_CLIENT_MAX:
+            # dicts keep insertion order, so the first key is the least recently used
+            del _WP_CLIENTS[next(iter(_WP_CLIENTS))]
+        return client
+
+
+def allowed_file(filename, suffixes):
+    """Check if file has allowed extension (suffixes like _IMG_SUFFIXES)"""
+    return filename.lower().endswith(suffixes)
+
+
+def resolve_terms(wp_client, category_names, tag_names):
+    """
+    Look up or create categories and tags concurrently
+    
+    Returns:
+        (category_ids, tag_ids) in the order the names were given
+    """
+    category_results = wp_client.resolve_terms_batch(category_names, 'categories', executor=_TERM_POOL)
+    tag_results = wp_client.resolve_terms_batch(tag_names, 'tags', executor=_TERM_POOL)
+    category_ids = [cat_id for cat_id in category_results if cat_id]
+    tag_ids = [tag_id for tag_id in tag_results if tag_id]
+    return category_ids, tag_ids
+
+
+def publish_ai_post(markdown_content, site, username, password, post_status, use_elementor):
+    """
+    Upload AI-generated markdown to WordPress
+    
+    Returns:
+        dict for the result.html template
+    """
+    # Ensure site URL has protocol
+    if not site.startswith(('http://', 'https://')):
+        site = 'https://' + site
+    
+    # Initialize WordPress client and validate credentials
+    wp_client = get_wp_client(site, username, password)
+    auth_result = wp_client.validate_credentials()
+    
+    if not auth_result['success']:
+        return {
+            'success': False,
+            'error': 'WordPress authentication failed',
+            'details': auth_result.get('error', 'Invalid credentials')
+        }
+    
+    # Parse the AI-generated markdown
+    parser = MarkdownParser(markdown_content=markdown_content)
+    metadata = parser.get_all_metadata()
+    
+    # Convert markdown to HTML
+    html_content = parser.to_html()
+    
+    # Process categories and tags
+    category_ids, tag_ids = resolve_terms(wp_client, metadata['categories'], metadata['tags'])
+    
+    # Prepare SEO meta fields
+    seo_meta = metadata['seo']
+    post_meta = {}
+    
+    if seo_meta.get('title'):
+        post_meta['_yoast_wpseo_title'] = seo_meta['title']
+    if seo_meta.get('description'):
+        post_meta['_yoast_wpseo_metadesc'] = seo_meta['description']
+    if seo_meta.get('keywords'):
+        post_meta['_yoast_wpseo_focuskw'] = seo_meta.get('focus_keyword', seo_meta['keywords'])
+    
+    # Prepare Elementor data (if enabled)
+    elementor_data = elementor_text_layout(html_content) if use_elementor else None
+    
+    # Create the WordPress post
+    post_result = wp_client.create_post(
+        title=metadata['title'],
+        content=html_content,
+        status=post_status,
+        categories=category_ids if category_ids else None,
+        tags=tag_ids if tag_ids else None,
+        excerpt=metadata.get('excerpt'),
+        meta=post_meta if post_meta else None,
+        elementor_data=elementor_data
+    )
+    
+    if post_result['success']:
+        return {
+            'success': True,
+            'title': post_result['title'],
+            'status': post_result['status'],
+            'post_id': post_result['id'],
+            'post_url': post_result['url'],
+            'uploaded_images': [],
+            'ai_generated': True
+        }
+    else:
+        return {
+            'success': False,
+            'error': 'Failed to create post',
+            'details': post_result.get('error', 'Unknown error')
+        }
 
-def allowed_file(filename, allowed_extensions):
-    """Check if file has allowed extension"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+
+def process_upload_job(site, username, password, md_bytes, images, post_status, use_elementor):
+    """
+    Upload a markdown post and its images to WordPress
+    
+    Runs inline, or in an RQ worker (`rq worker uploads`) when REDIS_URL is set.
+    
+    Args:
+        site: WordPress site URL (with protocol)
+        username: WordPress username
+        password: WordPress application password
+        md_bytes: Raw markdown file contents
+        images: List of (filename, bytes or file object) for the uploaded images
+        post_status: 'draft', 'publish', 'pending', etc.
+        use_elementor: Whether to attach Elementor builder data
+        
+    Returns:
+        dict for the result.html template
+    """
+    wp_client = get_wp_client(site, username, password)
+    
+    # 1. Parse markdown file
+    parser = MarkdownParser(markdown_content=md_bytes)
+    metadata = parser.get_all_metadata()
+    
+    # 2. Handle image uploads
+    uploaded_images = []
+    image_map = {}  # Map local paths to WP URLs
+    
+    # Also check for featured image in markdown metadata
+    featured_image_id = None
+    featured_image_path = metadata['featured_image']
+    
+    # Determine alt text from filename or markdown references
+    uploads = [
+        {
+            'file_obj': data if hasattr(data, 'read') else io.BytesIO(data),
+            'filename': filename,
+            'alt_text': filename.rsplit('.', 1)[0].replace('-', ' ').replace('_', ' ')
+        }
+        for filename, data in images
+    ]
+    
+    # Upload to WordPress in parallel (results keep the original order)
+    upload_results = wp_client.upload_media_batch(uploads, executor=_UPLOAD_POOL)
+    
+    for (filename, _), upload_result in zip(images, upload_results):
+        if upload_result['success']:
+            uploaded_images.append({
+                'filename': filename,
+                'id': upload_result['id'],
+                'url': upload_result['url']
+            })
+            
+            # Map various possible references to this image
+            image_map[filename] = upload_result['url']
+            image_map[f"images/{filename}"] = upload_result['url']
+            image_map[f"./images/{filename}"] = upload_result['url']
+            
+            # Check if this is the featured image
+            if featured_image_path and filename in featured_image_path:
+                featured_image_id = upload_result['id']
+        else:
+            logging.error(f"Failed to upload {filename}: {upload_result.get('error')}")
+    
+    # 3. Replace image references in content
+    if image_map:
+        updated_content = parser.replace_image_references(image_map)
+        parser.content = updated_content
+    
+    # 4. Convert markdown to HTML
+    html_content = parser.to_html()
+    
+    # 5. Process categories and tags
+    category_ids, tag_ids = resolve_terms(wp_client, metadata['categories'], metadata['tags'])
+    
+    # 6. Prepare SEO meta fields (for Yoast/RankMath)
+    seo_meta = metadata['seo']
+    post_meta = {}
+    
+    if seo_meta.get('title'):
+        post_meta['_yoast_wpseo_title'] = seo_meta['title']
+    if seo_meta.get('description'):
+        post_meta['_yoast_wpseo_metadesc'] = seo_meta['description']
+    if seo_meta.get('keywords'):
+        post_meta['_yoast_wpseo_focuskw'] = seo_meta.get('focus_keyword', seo_meta['keywords'])
+    
+    # 7. Prepare Elementor data (if enabled)
+    elementor_data = elementor_text_layout(html_content) if use_elementor else None
+    
+    # 8. Create the WordPress post
+    post_result = wp_client.create_post(
+        title=metadata['title'],
+        content=html_content,
+        status=post_status,
+        featured_media=featured_image_id,
+        categories=category_ids if category_ids else None,
+        tags=tag_ids if tag_ids else None,
+        excerpt=metadata.get('excerpt'),
+        meta=post_meta if post_meta else None,
+        elementor_data=elementor_data
+    )
+    
+    if post_result['success']:
+        return {
+            'success': True,
+            'title': post_result['title'],
+            'status': post_result['status'],
+            'post_id': post_result['id'],
+            'post_url': post_result['url'],
+            'uploaded_images': uploaded_images
+        }
+    else:
+        return {
+            'success': False,
+            'error': 'Failed to create post',
+            'details': post_result.get('error', 'Unknown error')
+        }
 
 
 @app.route("/")
@@ -47,13 +351,13 @@ def upload_form():
 @app.route("/sample-markdown")
 def sample_markdown():
     """Download a sample markdown template"""
-    sample_content = create_sample_markdown()
-    
     return send_file(
-        io.BytesIO(sample_content.encode('utf-8')),
+        io.BytesIO(_SAMPLE_MD_BYTES),
         mimetype='text/markdown',
         as_attachment=True,
-        download_name='sample-blog-post.md'
+        download_name='sample-blog-post.md',
+        etag=_SAMPLE_MD_ETAG,
+        max_age=86400
     )
 
 
@@ -90,15 +394,15 @@ def generate_ai():
             return redirect(url_for('generate_ai'))
         
         # Generate content with AI
-        ai_gen = AIContentGenerator()
-        markdown_content = ai_gen.generate_blog_post(
+        ai_gen = get_ai_gen()
+        markdown_content = run_async(ai_gen.generate_blog_post_async(
             prompt=prompt,
             tone=tone,
             length=length,
             include_seo=include_seo,
             categories=categories_input,
             tags=tags_input
-        )
+        ))
         
         # If download only, return the markdown file
         if download_only:
@@ -114,107 +418,9 @@ def generate_ai():
             flash('WordPress credentials are required for upload', 'error')
             return redirect(url_for('generate_ai'))
         
-        # Ensure site URL has protocol
-        if not site.startswith(('http://', 'https://')):
-            site = 'https://' + site
-        
-        # Initialize WordPress client and validate credentials
-        wp_client = WordPressClient(site, username, password)
-        auth_result = wp_client.validate_credentials()
-        
-        if not auth_result['success']:
-            return render_template('result.html', result={
-                'success': False,
-                'error': 'WordPress authentication failed',
-                'details': auth_result.get('error', 'Invalid credentials')
-            })
-        
-        # Parse the AI-generated markdown
-        parser = MarkdownParser(markdown_content=markdown_content)
-        metadata = parser.get_all_metadata()
-        
-        # Convert markdown to HTML
-        html_content = parser.to_html()
-        
-        # Process categories and tags
-        category_ids = []
-        for cat_name in metadata['categories']:
-            cat_id = wp_client.get_or_create_category(cat_name)
-            if cat_id:
-                category_ids.append(cat_id)
-        
-        tag_ids = []
-        for tag_name in metadata['tags']:
-            tag_id = wp_client.get_or_create_tag(tag_name)
-            if tag_id:
-                tag_ids.append(tag_id)
-        
-        # Prepare SEO meta fields
-        seo_meta = metadata['seo']
-        post_meta = {}
-        
-        if seo_meta.get('title'):
-            post_meta['_yoast_wpseo_title'] = seo_meta['title']
-        if seo_meta.get('description'):
-            post_meta['_yoast_wpseo_metadesc'] = seo_meta['description']
-        if seo_meta.get('keywords'):
-            post_meta['_yoast_wpseo_focuskw'] = seo_meta.get('focus_keyword', seo_meta['keywords'])
-        
-        # Prepare Elementor data (if enabled)
-        import json
-        elementor_data = None
-        if use_elementor:
-            elementor_data = [
-                {
-                    "id": "content",
-                    "elType": "section",
-                    "elements": [
-                        {
-                            "id": "column",
-                            "elType": "column",
-                            "elements": [
-                                {
-                                    "id": "text",
-                                    "elType": "widget",
-                                    "widgetType": "text-editor",
-                                    "settings": {
-                                        "editor": html_content
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            ]
-        
-        # Create the WordPress post
-        post_result = wp_client.create_post(
-            title=metadata['title'],
-            content=html_content,
-            status=post_status,
-            categories=category_ids if category_ids else None,
-            tags=tag_ids if tag_ids else None,
-            excerpt=metadata.get('excerpt'),
-            meta=post_meta if post_meta else None,
-            elementor_data=elementor_data
-        )
-        
-        if post_result['success']:
-            return render_template('result.html', result={
-                'success': True,
-                'title': post_result['title'],
-                'status': post_result['status'],
-                'post_id': post_result['id'],
-                'post_url': post_result['url'],
-                'uploaded_images': [],
-                'ai_generated': True
-            })
-        else:
-            return render_template('result.html', result={
-                'success': False,
-                'error': 'Failed to create post',
-                'details': post_result.get('error', 'Unknown error')
-            })
+        return render_template('result.html', result=publish_ai_post(
+            markdown_content, site, username, password, post_status, use_elementor
+        ))
     
     except Exception as e:
         logging.exception("Error generating AI content")
@@ -225,6 +431,133 @@ def generate_ai():
         })
 
 
+@app.route("/generate-ai/stream", methods=["POST"])
+def generate_ai_stream():
+    """
+    Generate blog post content as Server-Sent Events, then upload to WordPress
+    
+    Events:
+        message: {"delta": "..."} for each generated text fragment
+        status: {"status": "..."} progress updates after generation finishes
+        done: {"html": "..."} the rendered result page once the post is created
+        error: {"error": "...", "details": "..."}
+    """
+    prompt = request.form.get('prompt', '').strip()
+    tone = request.form.get('tone', 'professional')
+    length = request.form.get('length', 'medium')
+    categories_input = request.form.get('categories', '').strip()
+    tags_input = request.form.get('tags', '').strip()
+    include_seo = request.form.get('include_seo') == 'yes'
+    
+    site = request.form.get('site', '').strip()
+    username = request.form.get('username', '').strip()
+    password = request.form.get('account_password', '').strip()
+    post_status = request.form.get('post_status', 'draft')
+    use_elementor = request.form.get('use_elementor') == 'yes'
+    
+    if not prompt:
+        return jsonify({'error': 'Please enter a prompt or topic'}), 400
+    if not os.getenv('OPENAI_API_KEY'):
+        return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY in .env file'}), 400
+    if not all([site, username, password]):
+        return jsonify({'error': 'WordPress credentials are required for upload'}), 400
+    
+    ai_gen = get_ai_gen()
+    
+    def sse(data, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        return f"{prefix}data: {json.dumps(data)}\n\n"
+    
+    def events():
+        chunks = []
+        try:
+            for delta in ai_gen.stream_blog_post(
+                prompt=prompt,
+                tone=tone,
+                length=length,
+                include_seo=include_seo,
+                categories=categories_input,
+                tags=tags_input
+            ):
+                chunks.append(delta)
+                yield sse({'delta': delta})
+            
+            yield sse({'status': '📤 Uploading to WordPress...'}, event='status')
+            result = publish_ai_post(
+                ''.join(chunks), site, username, password, post_status, use_elementor
+            )
+            yield sse({'html': render_template('result.html', result=result)}, event='done')
+        
+        except Exception as e:
+            logging.exception("Error streaming AI content")
+            yield sse({'error': 'An unexpected error occurred', 'details': str(e)}, event='error')
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route("/generate-ai/bulk", methods=["POST"])
+def generate_ai_bulk():
+    """
+    Generate several blog posts at once (one prompt per line)
+    
+    Prompts are sent concurrently with shared tone/length/SEO settings.
+    Returns JSON: {"posts": [{"prompt": ..., "markdown": ...}, ...]}
+    """
+    prompts = [line.strip() for line in request.form.get('prompts', '').splitlines() if line.strip()]
+    tone = request.form.get('tone', 'professional')
+    length = request.form.get('length', 'medium')
+    categories_input = request.form.get('categories', '').strip()
+    tags_input = request.form.get('tags', '').strip()
+    include_seo = request.form.get('include_seo') == 'yes'
+    
+    if not prompts:
+        return jsonify({'error': 'Please enter at least one prompt (one per line)'}), 400
+    if len(prompts) > MAX_BULK_PROMPTS:
+        return jsonify({'error': f'At most {MAX_BULK_PROMPTS} prompts per request'}), 400
+    if not os.getenv('OPENAI_API_KEY'):
+        return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY in .env file'}), 400
+    
+    try:
+        ai_gen = get_ai_gen()
+        posts = run_async(ai_gen.generate_blog_posts_batch(
+            prompts,
+            tone=tone,
+            length=length,
+            include_seo=include_seo,
+            categories=categories_input,
+            tags=tags_input
+        ))
+    except Exception as e:
+        logging.exception("Error generating bulk AI content")
+        return jsonify({'error': 'An unexpected error occurred', 'details': str(e)}), 500
+    
+    return jsonify({'posts': [
+        {'prompt': prompt, 'markdown': markdown_content}
+        for prompt, markdown_content in zip(prompts, posts)
+    ]})
+
+
+@app.route("/metrics")
+def metrics():
+    """Report OpenAI response cache hit/miss counters"""
+    stats = {'llm_cache': shared_cache().stats()}
+    semantic_cache = shared_semantic_cache()
+    if semantic_cache is not None:
+        stats['semantic_cache'] = semantic_cache.stats()
+    return jsonify(stats)
+
+
+def _cred_response(body):
+    """JSON response for /check_wp_cred that the browser may reuse briefly"""
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = f'private, max-age={_CRED_CACHE_TTL}'
+    return response
+
+
 @app.route("/check_wp_cred", methods=["POST"])
 def check_wp_cred():
     """
@@ -235,14 +568,32 @@ def check_wp_cred():
     username = request.form['username']
     account_password = request.form['account_password']
 
+    cache_key = hashlib.sha256(f"{site}|{username}|{account_password}".encode('utf-8')).hexdigest()
+    with _CRED_CACHE_LOCK:
+        entry = _CRED_CACHE.get(cache_key)
+    if entry and time.time() - entry[0] < _CRED_CACHE_TTL:
+        return _cred_response(entry[1])
+
     endpoint = f"{site}/wp-json/wp/v2/posts?_embed"
 
-    response = requests.get(
+    response = SESSION.get(
         endpoint,
-        auth=HTTPBasicAuth(username, account_password)
+        auth=HTTPBasicAuth(username, account_password),
+        timeout=(3.05, 15)
     )
     if response.status_code == 200:
-        return jsonify(response.json())
+        # WordPress already sent JSON; pass the bytes through instead of re-encoding them
+        if 'json' in response.headers.get('Content-Type', ''):
+            body = response.content
+        else:
+            body = jsonify(response.json()).get_data()
+        with _CRED_CACHE_LOCK:
+            _CRED_CACHE.pop(cache_key, None)
+            _CRED_CACHE[cache_key] = (time.time(), body)
+            while len(_CRED_CACHE) > _CRED_CACHE_MAX:
+                # dicts keep insertion order, so the first key is the oldest
+                del _CRED_CACHE[next(iter(_CRED_CACHE))]
+        return _cred_response(body)
     else:
         return jsonify({
             "status": response.reason,
@@ -294,14 +645,14 @@ def upload_post():
                 'error': 'No markdown file selected'
             })
         
-        if not allowed_file(md_file.filename, ALLOWED_MD_EXTENSIONS):
+        if not allowed_file(md_file.filename, _MD_SUFFIXES):
             return render_template('result.html', result={
                 'success': False,
                 'error': 'Invalid file type. Please upload a .md or .markdown file'
             })
         
         # 3. Initialize WordPress client and validate credentials
-        wp_client = WordPressClient(site, username, password)
+        wp_client = get_wp_client(site, username, password)
         auth_result = wp_client.validate_credentials()
         
         if not auth_result['success']:
@@ -311,147 +662,29 @@ def upload_post():
                 'details': auth_result.get('error', 'Invalid credentials')
             })
         
-        # 4. Parse markdown file
-        md_content = md_file.read().decode('utf-8')
-        parser = MarkdownParser(markdown_content=md_content)
-        metadata = parser.get_all_metadata()
-        
-        # 5. Handle image uploads
-        uploaded_images = []
-        image_map = {}  # Map local paths to WP URLs
-        
-        # Get uploaded image files
-        image_files = request.files.getlist('images')
+        # 4. Read the markdown and images; the rest of the pipeline may run in a worker
+        md_bytes = md_file.stream.read()
         
-        # Also check for featured image in markdown metadata
-        featured_image_id = None
-        featured_image_path = parser.get_featured_image()
-        
-        # Upload all images
-        for img_file in image_files:
+        images = []
+        for img_file in request.files.getlist('images'):
             if img_file.filename == '':
                 continue
             
-            if not allowed_file(img_file.filename, ALLOWED_IMAGE_EXTENSIONS):
+            if not allowed_file(img_file.filename, _IMG_SUFFIXES):
                 logging.warning(f"Skipping invalid image file: {img_file.filename}")
                 continue
             
-            # Determine alt text from filename or markdown references
-            filename = secure_filename(img_file.filename)
-            alt_text = filename.rsplit('.', 1)[0].replace('-', ' ').replace('_', ' ')
-            
-            # Upload to WordPress
-            upload_result = wp_client.upload_media(
-                file_obj=img_file.stream,
-                filename=filename,
-                alt_text=alt_text
-            )
-            
-            if upload_result['success']:
-                uploaded_images.append({
-                    'filename': filename,
-                    'id': upload_result['id'],
-                    'url': upload_result['url']
-                })
-                
-                # Map various possible references to this image
-                image_map[filename] = upload_result['url']
-                image_map[f"images/{filename}"] = upload_result['url']
-                image_map[f"./images/{filename}"] = upload_result['url']
-                
-                # Check if this is the featured image
-                if featured_image_path and filename in featured_image_path:
-                    featured_image_id = upload_result['id']
-            else:
-                logging.error(f"Failed to upload {filename}: {upload_result.get('error')}")
-        
-        # 6. Replace image references in content
-        if image_map:
-            updated_content = parser.replace_image_references(image_map)
-            parser.content = updated_content
-        
-        # 7. Convert markdown to HTML
-        html_content = parser.to_html()
-        
-        # 8. Process categories and tags
-        category_ids = []
-        for cat_name in metadata['categories']:
-            cat_id = wp_client.get_or_create_category(cat_name)
-            if cat_id:
-                category_ids.append(cat_id)
+            # Queued jobs need the bytes; inline uploads stream each file from its own temp file
+            data = img_file.stream.read() if UPLOAD_QUEUE is not None else img_file.stream
+            images.append((secure_filename(img_file.filename), data))
         
-        tag_ids = []
-        for tag_name in metadata['tags']:
-            tag_id = wp_client.get_or_create_tag(tag_name)
-            if tag_id:
-                tag_ids.append(tag_id)
+        job_args = (site, username, password, md_bytes, images, post_status, use_elementor)
+        if UPLOAD_QUEUE is not None:
+            job = UPLOAD_QUEUE.enqueue('app.process_upload_job', *job_args,
+                                       job_timeout=600, result_ttl=3600)
+            return render_template('job.html', job_id=job.id), 202
         
-        # 9. Prepare SEO meta fields (for Yoast/RankMath)
-        seo_meta = metadata['seo']
-        post_meta = {}
-        
-        if seo_meta.get('title'):
-            post_meta['_yoast_wpseo_title'] = seo_meta['title']
-        if seo_meta.get('description'):
-            post_meta['_yoast_wpseo_metadesc'] = seo_meta['description']
-        if seo_meta.get('keywords'):
-            post_meta['_yoast_wpseo_focuskw'] = seo_meta.get('focus_keyword', seo_meta['keywords'])
-        
-        # 10. Prepare Elementor data (if enabled)
-        elementor_data = None
-        if use_elementor:
-            # Basic Elementor structure - user can edit in Elementor afterward
-            elementor_data = [
-                {
-                    "id": "content",
-                    "elType": "section",
-                    "elements": [
-                        {
-                            "id": "column",
-                            "elType": "column",
-                            "elements": [
-                                {
-                                    "id": "text",
-                                    "elType": "widget",
-                                    "widgetType": "text-editor",
-                                    "settings": {
-                                        "editor": html_content
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            ]
-        
-        # 11. Create the WordPress post
-        post_result = wp_client.create_post(
-            title=metadata['title'],
-            content=html_content,
-            status=post_status,
-            featured_media=featured_image_id,
-            categories=category_ids if category_ids else None,
-            tags=tag_ids if tag_ids else None,
-            excerpt=metadata.get('excerpt'),
-            meta=post_meta if post_meta else None,
-            elementor_data=elementor_data
-        )
-        
-        if post_result['success']:
-            return render_template('result.html', result={
-                'success': True,
-                'title': post_result['title'],
-                'status': post_result['status'],
-                'post_id': post_result['id'],
-                'post_url': post_result['url'],
-                'uploaded_images': uploaded_images
-            })
-        else:
-            return render_template('result.html', result={
-                'success': False,
-                'error': 'Failed to create post',
-                'details': post_result.get('error', 'Unknown error')
-            })
+        return render_template('result.html', result=process_upload_job(*job_args))
     
     except Exception as e:
         logging.exception("Error during upload")
@@ -462,5 +695,35 @@ def upload_post():
         })
 
 
+@app.route("/job/<job_id>")
+def job_status(job_id):
+    """
+    Report the status of a queued upload
+    
+    Returns JSON: {"status": ...}, plus the rendered result page as "html"
+    once the job has finished or failed.
+    """
+    if UPLOAD_QUEUE is None:
+        return jsonify({'error': 'Background uploads are not enabled'}), 404
+    
+    job = UPLOAD_QUEUE.fetch_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    status = job.get_status()
+    response = {'status': status}
+    if status == 'finished':
+        response['html'] = render_template('result.html', result=job.result)
+    elif status == 'failed':
+        details = (job.exc_info or '').strip().splitlines()
+        response['html'] = render_template('result.html', result={
+            'success': False,
+            'error': 'An unexpected error occurred',
+            'details': details[-1] if details else 'Upload job failed'
+        })
+    return jsonify(response)
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see Procfile)
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1")
\ No newline at end of file
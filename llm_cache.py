@@ -0,0 +1,332 @@
+"""
+LLM Response Cache
+Exact-match and embedding-similarity caching of OpenAI completions
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Protocol
+
+import numpy as np
+
+
+class CacheBackend(Protocol):
+    """Storage interface used by LLMCache"""
+
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        ...
+
+
+class InMemoryLRU:
+    """Process-local LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Args:
+            max_entries: Maximum number of responses kept before evicting the oldest
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Redis store, shared between worker processes"""
+
+    def __init__(self, url: str, prefix: str = "llm-cache:"):
+        """
+        Args:
+            url: Redis connection URL (e.g., 'redis://localhost:6379/0')
+            prefix: Key prefix to namespace cache entries
+        """
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._errors = redis.RedisError
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.client.get(self.prefix + key)
+        except self._errors as e:
+            logging.warning(f"LLM cache read failed: {str(e)}")
+            return None
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        try:
+            self.client.set(self.prefix + key, value, ex=ttl_seconds)
+        except self._errors as e:
+            logging.warning(f"LLM cache write failed: {str(e)}")
+
+
+class LLMCache:
+    """Exact-match cache for chat completion responses"""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 86400):
+        """
+        Args:
+            backend: Storage backend (InMemoryLRU or RedisBackend)
+            ttl_seconds: How long a cached response stays valid
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Build a deterministic key from the request parameters"""
+        payload = json.dumps(parts, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value, self.ttl_seconds)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for the /metrics endpoint"""
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over prompt embeddings
+
+    Entries are only compared within the same scope (model, system prompt,
+    sampling settings and the non-embedded part of the user prompt), so a
+    hit differs from the original request only in the wording of the
+    embedded text. Entries expire after ttl_seconds, and once max_entries
+    are stored each new entry overwrites the oldest one.
+    """
+
+    def __init__(self, directory: Optional[str] = None, threshold: float = 0.92,
+                 ttl_seconds: int = 86400, max_entries: int = 2048):
+        """
+        Args:
+            directory: Where to persist embeddings and responses (in-memory only if None)
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: How long a cached response stays valid
+            max_entries: Maximum number of responses kept before overwriting the oldest
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Ring buffer: row i of the matrix and slot i of the other arrays are one entry
+        self._matrix: Optional[np.ndarray] = None
+        self._scope_hashes = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Optional[str]] = [None] * max_entries
+        self._count = 0
+        self._next = 0
+        self._db = None
+        self._writer = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(directory, 'semantic.db'), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries (slot INTEGER PRIMARY KEY, scope TEXT NOT NULL, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL, embedding BLOB NOT NULL)"
+            )
+            self._load()
+            # Inserts are written by one background thread so callers never wait on disk
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='semantic-cache')
+
+    def _allocate(self, dimensions: int) -> None:
+        """Empty the buffer and size it for embeddings of the given length"""
+        self._matrix = np.zeros((self.max_entries, dimensions), dtype=np.float32)
+        self._expires[:] = 0.0
+        self._values = [None] * self.max_entries
+        self._count = 0
+        self._next = 0
+
+    def _load(self) -> None:
+        """Rebuild the in-memory index from the unexpired rows on disk, renumbering their slots"""
+        rows = self._db.execute(
+            "SELECT scope, value, expires_at, embedding FROM entries WHERE expires_at > ? ORDER BY expires_at",
+            (time.time(),)
+        ).fetchall()[-self.max_entries:]
+        with self._db:
+            self._db.execute("DELETE FROM entries")
+            self._db.executemany(
+                "INSERT INTO entries (slot, scope, value, expires_at, embedding) VALUES (?, ?, ?, ?, ?)",
+                ((slot,) + tuple(row) for slot, row in enumerate(rows))
+            )
+        if not rows:
+            return
+        self._allocate(len(rows[0][3]) // 4)
+        for slot, (scope, value, expires_at, embedding) in enumerate(rows):
+            self._matrix[slot] = np.frombuffer(embedding, dtype=np.float32)
+            self._scope_hashes[slot] = hash(scope)
+            self._expires[slot] = expires_at
+            self._values[slot] = value
+        self._count = len(rows)
+        self._next = len(rows) % self.max_entries
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding, scope: str) -> Optional[str]:
+        """Return the cached response for the most similar unexpired prompt in scope"""
+        query = self._normalize(embedding)
+        with self._lock:
+            if not self._count or self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            count = self._count
+            scores = self._matrix[:count] @ query
+            live = (self._scope_hashes[:count] == hash(scope)) & (self._expires[:count] > time.time())
+            scores[~live] = -1.0
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                self.hits += 1
+                return self._values[best]
+            self.misses += 1
+            return None
+
+    def set(self, embedding, scope: str, value: str) -> None:
+        vector = self._normalize(embedding)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            # First entry, or the embedding model changed: start over
+            reset = self._matrix is None or self._matrix.shape[1] != vector.shape[0]
+            if reset:
+                self._allocate(vector.shape[0])
+            slot = self._next
+            self._matrix[slot] = vector
+            self._scope_hashes[slot] = hash(scope)
+            self._expires[slot] = expires_at
+            self._values[slot] = value
+            self._next = (slot + 1) % self.max_entries
+            self._count = max(self._count, slot + 1)
+
+        if self._writer is not None:
+            self._writer.submit(self._persist, slot, scope, value, expires_at, vector.tobytes(), reset)
+
+    def _persist(self, slot: int, scope: str, value: str, expires_at: float,
+                 embedding: bytes, reset: bool) -> None:
+        """Write one entry to disk (runs on the writer thread)"""
+        try:
+            with self._db:
+                if reset:
+                    self._db.execute("DELETE FROM entries")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (slot, scope, value, expires_at, embedding) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (slot, scope, value, expires_at, embedding)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Semantic cache write failed: {str(e)}")
+
+    def close(self) -> None:
+        """Finish pending disk writes and close the database"""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for the /metrics endpoint"""
+        total = self.hits + self.misses
+        with self._lock:
+            entries = int((self._expires[:self._count] > time.time()).sum())
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+_shared_cache: Optional[LLMCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_cache() -> LLMCache:
+    """
+    Process-wide cache configured from the environment
+
+    Uses Redis when OPENAI_CACHE_URL is set, otherwise an in-memory LRU.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            url = os.getenv('OPENAI_CACHE_URL')
+            if url:
+                backend = RedisBackend(url)
+            else:
+                backend = InMemoryLRU(int(os.getenv('OPENAI_CACHE_SIZE', '512')))
+            _shared_cache = LLMCache(backend, ttl_seconds=int(os.getenv('OPENAI_CACHE_TTL', '86400')))
+        return _shared_cache
+
+
+_shared_semantic_cache: Optional[SemanticCache] = None
+
+
+def shared_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Process-wide semantic cache, or None unless OPENAI_SEMANTIC_CACHE_DIR is set
+    """
+    global _shared_semantic_cache
+    directory = os.getenv('OPENAI_SEMANTIC_CACHE_DIR')
+    if not directory:
+        return None
+    with _shared_cache_lock:
+        if _shared_semantic_cache is None:
+            _shared_semantic_cache = SemanticCache(
+                directory,
+                threshold=float(os.getenv('OPENAI_SEMANTIC_CACHE_THRESHOLD', '0.92')),
+                ttl_seconds=int(os.getenv('OPENAI_CACHE_TTL', '86400')),
+                max_entries=int(os.getenv('OPENAI_SEMANTIC_CACHE_SIZE', '2048'))
+            )
+        return _shared_semantic_cache
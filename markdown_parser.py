@@ -2,44 +2,216 @@
 Markdown Parser with Frontmatter Support
 Extracts metadata, images, and converts markdown to HTML for WordPress
 """
-import frontmatter
-import markdown
 import re
-from typing import Dict, List, Optional
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from pathlib import Path
 
+try:
+    import ahocorasick
+except ImportError:  # optional: linear-time replacement for very large image maps
+    ahocorasick = None
+
+if TYPE_CHECKING:
+    import markdown
+
+# Image maps at least this large use an Aho-Corasick automaton instead of a regex alternation
+_AHO_MIN_PATHS = 64
+
+# Compiled once at import instead of relying on re's internal pattern cache
+_H1_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+_PARA_RE = re.compile(r'^(?!#)(.+?)(?:\n\n|\Z)', re.MULTILINE | re.DOTALL)
+# Comma-separated frontmatter lists: splits and strips in one pass
+_LIST_SPLIT = re.compile(r'\s*,\s*')
+
+# Same test as frontmatter's YAMLHandler.detect(), without importing frontmatter
+_YAML_BOUNDARY = re.compile(r'^-{3,}\s*$', re.MULTILINE)
+
+# markdown and frontmatter (with PyYAML) are imported on first use, so code that
+# only needs WordPressClient or the metadata of plain markdown never loads them
+_markdown = None
+_frontmatter = None
+_YAML_HANDLER = None
+_IMPORT_LOCK = threading.Lock()
+
+# Markdown converters keyed by extension tuple; building one loads every extension.
+# A converter holds per-document state, so conversions take the lock. Reuse
+# relies on reset() clearing all of it, which abbr only does from Markdown 3.7.
+_MD_CACHE: Dict[tuple, 'markdown.Markdown'] = {}
+_MD_LOCK = threading.Lock()
+
+
+def _load_markdown():
+    """Import markdown on first use"""
+    global _markdown
+    if _markdown is None:
+        with _IMPORT_LOCK:
+            if _markdown is None:
+                import markdown
+                _markdown = markdown
+    return _markdown
+
+
+def _load_frontmatter():
+    """
+    Import frontmatter on first use and build the YAML handler
+
+    The handler is pinned to libyaml's CSafeLoader when it is available.
+    """
+    global _frontmatter, _YAML_HANDLER
+    if _frontmatter is None:
+        with _IMPORT_LOCK:
+            if _frontmatter is None:
+                import frontmatter
+                import yaml
+                from frontmatter.default_handlers import YAMLHandler
+
+                try:
+                    from yaml import CSafeLoader as loader
+                except ImportError:  # PyYAML built without libyaml
+                    from yaml import SafeLoader as loader
+
+                class _FastYAMLHandler(YAMLHandler):
+                    def load(self, fm: str, **kwargs) -> object:
+                        kwargs.setdefault('Loader', loader)
+                        return yaml.load(fm, **kwargs)
+
+                _YAML_HANDLER = _FastYAMLHandler()
+                _frontmatter = frontmatter
+    return _frontmatter
+
+# Frontmatter keys that get_all_metadata() does not repeat under custom_fields
+_RESERVED_KEYS = frozenset({
+    'title', 'excerpt', 'categories', 'tags', 'featured_image',
+    'status', 'seo_title', 'seo_description', 'keywords'
+})
+
+
+def _scan_images(content: str) -> List[tuple]:
+    """
+    Find markdown images: ![alt](path "optional title")
+    
+    A str.find-based scanner that matches exactly what the regex
+    !\[([^\]]*)\]\(([^\)]+?)(?:\s+"([^"]*)")?\) would, without backtracking.
+    
+    Returns:
+        List of (alt, path, title or None, start, end) tuples
+    """
+    images = []
+    i = content.find('![')
+    while i != -1:
+        close = content.find(']', i + 2)
+        if close == -1:
+            break
+        paren = close + 1
+        if not content.startswith('(', paren):
+            i = content.find('![', i + 1)
+            continue
+        end = content.find(')', paren + 1)
+        if end == -1:
+            break  # every later image needs a ')' too
+        if end == paren + 1:
+            i = content.find('![', i + 1)
+            continue
+        
+        alt = content[i + 2:close]
+        path_start = paren + 1
+        match = None
+        
+        # The shortest path followed by whitespace + "title" + ')' wins
+        quote = content.find('"', path_start + 2, end)
+        while quote != -1:
+            if content[quote - 1].isspace():
+                path_end = quote - 1
+                while path_end - 1 > path_start and content[path_end - 1].isspace():
+                    path_end -= 1
+                title_end = content.find('"', quote + 1)
+                if title_end != -1 and content.startswith(')', title_end + 1):
+                    match = (alt, content[path_start:path_end], content[quote + 1:title_end],
+                             i, title_end + 2)
+                    break
+            quote = content.find('"', quote + 1, end)
+        
+        if match is None:
+            match = (alt, content[path_start:end], None, i, end + 1)
+        images.append(match)
+        i = content.find('![', match[4])
+    return images
+
+
+def term_names(value) -> List[str]:
+    """
+    Categories/tags as a list of non-empty strings
+
+    Accepts a comma-separated string or a list (from YAML frontmatter or a
+    caller of the WordPress clients); list items may be numbers
+    (tags: [2024, python]) or nulls, which are converted or dropped.
+    """
+    if isinstance(value, str):
+        return [name for name in _LIST_SPLIT.split(value.strip()) if name]
+    if not isinstance(value, (list, tuple)):
+        return []
+    names = (str(name).strip() for name in value if name is not None)
+    return [name for name in names if name]
+
 
 class MarkdownParser:
     """Parse markdown files with YAML frontmatter for WordPress posts"""
     
-    def __init__(self, markdown_content: str = None, markdown_file: str = None):
+    # SEO field -> frontmatter keys to read it from, in priority order
+    _SEO_MAP = (
+        ('title', ('seo_title', 'meta_title')),
+        ('description', ('seo_description', 'meta_description', 'description')),
+        ('keywords', ('keywords',)),
+        ('focus_keyword', ('focus_keyword',)),
+    )
+    
+    def __init__(self, markdown_content: Union[str, bytes] = None, markdown_file: str = None):
         """
         Initialize parser with markdown content or file
         
         Args:
-            markdown_content: Raw markdown string
+            markdown_content: Raw markdown string, or UTF-8 bytes as uploaded
             markdown_file: Path to markdown file
         """
         if markdown_file:
             with open(markdown_file, 'r', encoding='utf-8') as f:
                 self.raw_content = f.read()
+        elif isinstance(markdown_content, bytes) and markdown_content:
+            # Decode uploads once here rather than copying them in the caller
+            self.raw_content = markdown_content.decode('utf-8', errors='replace')
         elif markdown_content:
             self.raw_content = markdown_content
         else:
             raise ValueError("Either markdown_content or markdown_file must be provided")
         
-        # Parse frontmatter
-        self.post = frontmatter.loads(self.raw_content)
-        self.metadata = self.post.metadata
-        self.content = self.post.content
+        # Parse frontmatter; an explicit handler skips frontmatter's format
+        # detection, so only pass it for YAML and let TOML/JSON be detected
+        is_yaml = _YAML_BOUNDARY.match(self.raw_content) is not None
+        # frontmatter normalises line endings twice (loads, then parse) and
+        # looks for a delimiter again after stripping
+        text = self.raw_content.replace('\r\n', '\n').replace('\r\n', '\n').strip()
+        if not is_yaml and not _YAML_BOUNDARY.match(text) and not text.startswith(('+++', '{', '}')):
+            # No frontmatter block at all: skip the library
+            self.post = None
+            self.metadata = {}
+            self.content = text
+        else:
+            frontmatter = _load_frontmatter()
+            self.post = frontmatter.loads(self.raw_content, handler=_YAML_HANDLER if is_yaml else None)
+            self.metadata = self.post.metadata
+            self.content = self.post.content
+        self._image_pattern = None  # (paths, compiled regex) from the last replace_image_references
         
     def get_title(self) -> str:
         """Extract post title from frontmatter or first H1"""
         if 'title' in self.metadata:
             return self.metadata['title']
         
-        # Try to extract from first H1
-        h1_match = re.search(r'^#\s+(.+)$', self.content, re.MULTILINE)
+        # Try to extract from first H1 (no '#' means no heading to search for)
+        if '#' not in self.content:
+            return "Untitled Post"
+        h1_match = _H1_RE.search(self.content)
         if h1_match:
             return h1_match.group(1)
         
@@ -54,7 +226,9 @@ class MarkdownParser:
             return self.metadata['description']
         
         # Generate excerpt from first paragraph (limit 200 chars)
-        first_para = re.search(r'^(?!#)(.+?)(?:\n\n|\Z)', self.content, re.MULTILINE | re.DOTALL)
+        if not self.content:
+            return None
+        first_para = _PARA_RE.search(self.content)
         if first_para:
             excerpt = first_para.group(1).strip()
             if len(excerpt) > 200:
@@ -65,17 +239,11 @@ class MarkdownParser:
     
     def get_categories(self) -> List[str]:
         """Extract categories from frontmatter"""
-        categories = self.metadata.get('categories', [])
-        if isinstance(categories, str):
-            return [cat.strip() for cat in categories.split(',')]
-        return categories if isinstance(categories, list) else []
+        return term_names(self.metadata.get('categories', []))
     
     def get_tags(self) -> List[str]:
         """Extract tags from frontmatter"""
-        tags = self.metadata.get('tags', [])
-        if isinstance(tags, str):
-            return [tag.strip() for tag in tags.split(',')]
-        return tags if isinstance(tags, list) else []
+        return term_names(self.metadata.get('tags', []))
     
     def get_featured_image(self) -> Optional[str]:
         """Extract featured image path from frontmatter"""
@@ -89,32 +257,17 @@ class MarkdownParser:
             dict with SEO fields (title, description, keywords, etc.)
         """
         seo = {}
+        metadata = self.metadata
         
-        # SEO Title
-        if 'seo_title' in self.metadata:
-            seo['title'] = self.metadata['seo_title']
-        elif 'meta_title' in self.metadata:
-            seo['title'] = self.metadata['meta_title']
+        for field, keys in self._SEO_MAP:
+            for key in keys:
+                if key in metadata:
+                    seo[field] = metadata[key]
+                    break
         
-        # SEO Description
-        if 'seo_description' in self.metadata:
-            seo['description'] = self.metadata['seo_description']
-        elif 'meta_description' in self.metadata:
-            seo['description'] = self.metadata['meta_description']
-        elif 'description' in self.metadata:
-            seo['description'] = self.metadata['description']
-        
-        # Keywords
-        if 'keywords' in self.metadata:
-            keywords = self.metadata['keywords']
-            if isinstance(keywords, list):
-                seo['keywords'] = ', '.join(keywords)
-            else:
-                seo['keywords'] = keywords
-        
-        # Focus keyword (Yoast)
-        if 'focus_keyword' in self.metadata:
-            seo['focus_keyword'] = self.metadata['focus_keyword']
+        # Keywords may be a YAML list
+        if isinstance(seo.get('keywords'), list):
+            seo['keywords'] = ', '.join(seo['keywords'])
         
         return seo
     
@@ -129,21 +282,17 @@ class MarkdownParser:
         Returns:
             List of dicts with 'alt', 'path', and 'markdown_syntax'
         """
-        images = []
+        if '![' not in self.content:
+            return []
         
-        # Match markdown image syntax: ![alt](path "optional title")
-        pattern = r'!\[([^\]]*)\]\(([^\)]+?)(?:\s+"([^"]*)")?\)'
+        images = []
         
-        for match in re.finditer(pattern, self.content):
-            alt_text = match.group(1)
-            image_path = match.group(2)
-            title = match.group(3)
-            
+        for alt_text, image_path, title, start, end in _scan_images(self.content):
             images.append({
                 'alt': alt_text,
                 'path': image_path,
                 'title': title,
-                'markdown_syntax': match.group(0)
+                'markdown_syntax': self.content[start:end]
             })
         
         return images
@@ -168,8 +317,12 @@ class MarkdownParser:
                 'toc'              # Table of contents
             ]
         
-        md = markdown.Markdown(extensions=extensions)
-        html_content = md.convert(self.content)
+        key = tuple(extensions)
+        with _MD_LOCK:
+            md = _MD_CACHE.get(key)
+            if md is None:
+                md = _MD_CACHE[key] = _load_markdown().Markdown(extensions=extensions)
+            html_content = md.reset().convert(self.content)
         
         return html_content
     
@@ -183,13 +336,48 @@ class MarkdownParser:
         Returns:
             Markdown content with updated image URLs
         """
-        updated_content = self.content
+        if not image_map:
+            return self.content
+        
+        # One pass over the content; longest paths first so 'images/a.png'
+        # wins over its suffix 'a.png' instead of being rewritten twice
+        paths = frozenset(image_map)
+        if self._image_pattern is None or self._image_pattern[0] != paths:
+            if ahocorasick is not None and len(paths) >= _AHO_MIN_PATHS and '' not in paths:
+                matcher = ahocorasick.Automaton()
+                for path in paths:
+                    matcher.add_word(path, path)
+                matcher.make_automaton()
+            else:
+                matcher = re.compile('|'.join(
+                    re.escape(path) for path in sorted(paths, key=len, reverse=True)
+                ))
+            self._image_pattern = (paths, matcher)
+        
+        matcher = self._image_pattern[1]
+        if isinstance(matcher, re.Pattern):
+            return matcher.sub(lambda m: image_map[m.group(0)], self.content)
         
-        for local_path, wp_url in image_map.items():
-            # Replace the path in markdown syntax
-            updated_content = updated_content.replace(local_path, wp_url)
+        # Keep the longest path starting at each offset, then take them left to
+        # right without overlaps: the same matches the regex alternation makes.
+        # (iter_long() is not equivalent: it skips matches after a failed longer one.)
+        longest = {}
+        for end, path in matcher.iter(self.content):
+            start = end - len(path) + 1
+            if len(path) > len(longest.get(start, '')):
+                longest[start] = path
         
-        return updated_content
+        parts = []
+        last = 0
+        for start in sorted(longest):
+            if start < last:
+                continue
+            path = longest[start]
+            parts.append(self.content[last:start])
+            parts.append(image_map[path])
+            last = start + len(path)
+        parts.append(self.content[last:])
+        return ''.join(parts)
     
     def get_all_metadata(self) -> Dict:
         """Get all parsed metadata in one dict"""
@@ -201,10 +389,8 @@ class MarkdownParser:
             'featured_image': self.get_featured_image(),
             'status': self.get_status(),
             'seo': self.get_seo_metadata(),
-            'custom_fields': {k: v for k, v in self.metadata.items() 
-                            if k not in ['title', 'excerpt', 'categories', 'tags', 
-                                       'featured_image', 'status', 'seo_title', 
-                                       'seo_description', 'keywords']}
+            'custom_fields': {k: v for k, v in self.metadata.items()
+                            if k not in _RESERVED_KEYS}
         }
 
 
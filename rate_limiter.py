@@ -0,0 +1,123 @@
+"""
+OpenAI Rate Limiter
+Token-bucket throttling of requests-per-minute and tokens-per-minute
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+
+class RateLimiter:
+    """
+    Block before a request when the RPM or TPM bucket is empty
+
+    Both buckets refill continuously; a request needs one request token and
+    its estimated token count. Mirrors the OpenAI cookbook's
+    api_request_parallel_processor design.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        """
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Tokens (prompt + completion) allowed per minute
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_tokens = float(rpm)
+        self.token_tokens = float(tpm)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take capacity if available; otherwise return seconds to wait"""
+        # A request larger than the whole bucket only waits for a full bucket
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.last
+            self.last = now
+            self.request_tokens = min(self.rpm, self.request_tokens + self.rpm * elapsed / 60)
+            self.token_tokens = min(self.tpm, self.token_tokens + self.tpm * elapsed / 60)
+
+            if self.request_tokens >= 1 and self.token_tokens >= tokens:
+                self.request_tokens -= 1
+                self.token_tokens -= tokens
+                return 0.0
+
+            return max(
+                (1 - self.request_tokens) * 60 / self.rpm,
+                (tokens - self.token_tokens) * 60 / self.tpm
+            )
+
+    def acquire(self, tokens: int) -> None:
+        """Block the calling thread until the request fits in both buckets"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Wait (without blocking the event loop) until the request fits"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def reserve(self, tokens: int):
+        """async with limiter.reserve(n): ... around an async API call"""
+        await self.acquire_async(tokens)
+        yield
+
+
+def estimate_tokens(model: str, *texts: str, max_tokens: int = 0) -> int:
+    """
+    Estimate the tokens a chat request counts against the TPM limit
+
+    Args:
+        model: Model name, used to pick the tokenizer
+        texts: Message contents
+        max_tokens: Completion limit (counted in full, as OpenAI does)
+    """
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        prompt_tokens = sum(len(encoding.encode(text)) for text in texts)
+    else:
+        prompt_tokens = sum(len(text) for text in texts) // 4
+    return prompt_tokens + max_tokens
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def shared_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter configured from OPENAI_RPM / OPENAI_TPM
+
+    The limits are per OpenAI account, so when the app runs as WEB_WORKERS
+    processes each one gets an equal share of the budget.
+    """
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            workers = max(1, int(os.getenv('WEB_WORKERS', '1')))
+            _shared_limiter = RateLimiter(
+                rpm=max(1, int(os.getenv('OPENAI_RPM', '500')) // workers),
+                tpm=max(1, int(os.getenv('OPENAI_TPM', '200000')) // workers)
+            )
+        return _shared_limiter
@@ -0,0 +1,64 @@
+"""
+Tests for AIContentGenerator's caching around streamed and plain completions
+"""
+from unittest import mock
+
+import pytest
+
+from ai_generator import AIContentGenerator
+from llm_cache import InMemoryLRU, LLMCache, SemanticCache
+from rate_limiter import RateLimiter
+
+POST = "---\ntitle: A\n---\n# A\n\nBody text.\n"
+
+
+def _chunk(text):
+    chunk = mock.Mock()
+    chunk.choices = [mock.Mock()]
+    chunk.choices[0].delta.content = text
+    return chunk
+
+
+def _completion(text):
+    response = mock.Mock()
+    response.choices = [mock.Mock()]
+    response.choices[0].message.content = text
+    return response
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.delenv('OPENAI_SEMANTIC_CACHE_DIR', raising=False)
+    gen = AIContentGenerator(cache=LLMCache(InMemoryLRU()), limiter=RateLimiter(10**6, 10**9))
+    gen.client = mock.Mock()
+    return gen
+
+
+def test_stream_yields_text_unchanged(generator):
+    pieces = ["---\ntit", "le: A\n---\n# A", "\n\nBody text.\n"]
+    generator.client.chat.completions.create.return_value = iter(_chunk(p) for p in pieces)
+    assert list(generator.stream_blog_post("topic")) == pieces
+
+
+def test_streamed_post_is_cached_for_generate_blog_post(generator):
+    generator.client.chat.completions.create.return_value = iter([_chunk(POST[:10]), _chunk(POST[10:])])
+    assert ''.join(generator.stream_blog_post("topic")) == POST
+    assert generator.generate_blog_post("topic") == POST
+    assert list(generator.stream_blog_post("topic")) == [POST]
+    assert generator.client.chat.completions.create.call_count == 1
+
+
+def test_semantic_cache_embeds_only_the_topic(generator):
+    generator.semantic_cache = SemanticCache(threshold=0.9)
+    generator.client.embeddings.create.return_value = mock.Mock(data=[mock.Mock(embedding=[1.0, 0.0])])
+    generator.client.chat.completions.create.return_value = _completion(POST)
+
+    assert generator.generate_blog_post("Python tips") == POST
+    assert generator.client.embeddings.create.call_args.kwargs['input'] == "Python tips"
+    # Same embedding, different suggested tags: a different scope, so a new completion
+    generator.generate_blog_post("Python tips!", tags="news")
+    assert generator.client.chat.completions.create.call_count == 2
+    # Same embedding and settings: served from the semantic cache
+    assert generator.generate_blog_post("python tips") == POST
+    assert generator.client.chat.completions.create.call_count == 2
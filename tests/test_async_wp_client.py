@@ -0,0 +1,190 @@
+"""
+Tests for AsyncWordPressClient against an httpx.MockTransport fake of the REST API
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import wp_client
+from wp_client import AsyncWordPressClient
+
+SITE = 'https://wp.test'
+
+
+class FakeWordPress:
+    """Just enough of /wp-json/wp/v2 for terms, media and posts"""
+
+    def __init__(self, terms=None):
+        # kind -> list of {'id', 'name', 'slug', 'count'}
+        self.terms = {'categories': [], 'tags': []}
+        for kind, entries in (terms or {}).items():
+            self.terms[kind] = [dict(entry) for entry in entries]
+        self.requests = []
+        self.posts = []
+        self._next_id = 100
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        params = request.url.params
+        self.requests.append((request.method, path, dict(params)))
+        kind = path.rsplit('/', 1)[-1]
+
+        if kind in self.terms and request.method == 'GET':
+            terms = self.terms[kind]
+            if 'slug' in params:
+                slugs = params['slug'].split(',')
+                return httpx.Response(200, json=[t for t in terms if t['slug'] in slugs])
+            if 'search' in params:
+                needle = params['search'].lower()
+                return httpx.Response(200, json=[t for t in terms if needle in t['name'].lower()])
+            popular = sorted((t for t in terms if t['count']), key=lambda t: -t['count'])
+            return httpx.Response(200, json=popular[:int(params.get('per_page', 10))])
+
+        if kind in self.terms and request.method == 'POST':
+            name = json.loads(request.content)['name']
+            existing = next((t for t in self.terms[kind] if t['name'].lower() == name.lower()), None)
+            if existing:
+                return httpx.Response(400, json={
+                    'code': 'term_exists',
+                    'message': 'A term with the name provided already exists.',
+                    'data': {'status': 400, 'term_id': existing['id']}
+                })
+            term = {'id': self._new_id(), 'name': name, 'slug': name.lower(), 'count': 0}
+            self.terms[kind].append(term)
+            return httpx.Response(201, json=term)
+
+        if path.endswith('/media') and request.method == 'POST':
+            filename = request.headers['Content-Disposition'].split('filename="')[1].rstrip('"')
+            media_id = self._new_id()
+            return httpx.Response(201, json={
+                'id': media_id,
+                'source_url': f'{SITE}/wp-content/uploads/{filename}',
+                'title': {'rendered': filename},
+                'mime_type': request.headers['Content-Type']
+            })
+
+        if '/media/' in path and request.method == 'POST':
+            return httpx.Response(200, json={'id': int(kind), **json.loads(request.content)})
+
+        if path.endswith('/posts') and request.method == 'POST':
+            body = json.loads(request.content)
+            self.posts.append(body)
+            return httpx.Response(201, json={
+                'id': self._new_id(),
+                'link': f'{SITE}/?p={len(self.posts)}',
+                'status': body['status'],
+                'title': {'rendered': body['title']}
+            })
+
+        return httpx.Response(404, json={'code': 'rest_no_route'})
+
+    def term_creates(self, kind):
+        return [r for r in self.requests if r[0] == 'POST' and r[1].endswith('/' + kind)]
+
+    def slug_lookups(self, kind):
+        return [r for r in self.requests if r[0] == 'GET' and r[1].endswith('/' + kind) and 'slug' in r[2]]
+
+
+@pytest.fixture(autouse=True)
+def fresh_term_cache(monkeypatch):
+    """The term cache is process-wide; give every test an empty one"""
+    monkeypatch.setattr(wp_client, '_TERM_CACHE', {})
+    monkeypatch.setattr(wp_client, '_TERM_SEEDED', {})
+
+
+def _run(fake, coro_fn):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fake.handle)) as client:
+            return await coro_fn(AsyncWordPressClient(SITE, 'user', 'pass', client=client))
+    return asyncio.run(main())
+
+
+def test_duplicate_and_case_variant_names_resolve_once():
+    fake = FakeWordPress({'tags': [{'id': 7, 'name': 'Python', 'slug': 'python', 'count': 0}]})
+    ids = _run(fake, lambda wp: wp.resolve_terms(['Python', 'python', 'New', 'NEW', 'new', 'PYTHON'], 'tags'))
+
+    new_id = next(t['id'] for t in fake.terms['tags'] if t['name'] == 'New')
+    assert ids == [7, 7, new_id, new_id, new_id, 7]
+    assert len(fake.slug_lookups('tags')) == 1
+    assert fake.slug_lookups('tags')[0][2]['slug'] == 'new,python'
+    assert len(fake.term_creates('tags')) == 1
+
+
+def test_seeded_terms_skip_the_slug_lookup():
+    fake = FakeWordPress({'categories': [{'id': 3, 'name': 'News', 'slug': 'news', 'count': 12}]})
+    ids = _run(fake, lambda wp: wp.resolve_terms_batch(['news', 'News'], 'categories'))
+
+    assert ids == {'news': 3}
+    assert fake.slug_lookups('categories') == []
+    assert fake.term_creates('categories') == []
+
+
+def test_term_exists_answer_is_used_when_slug_lookup_misses():
+    # WordPress slugs 'Café' as 'cafe'; the client's approximation ('caf') misses it
+    fake = FakeWordPress({'categories': [{'id': 42, 'name': 'Café', 'slug': 'cafe', 'count': 0}]})
+    ids = _run(fake, lambda wp: wp.resolve_terms(['Café'], 'categories'))
+
+    assert ids == [42]
+    assert len(fake.term_creates('categories')) == 1
+    assert wp_client._lookup_term(SITE, 'categories', 'café') == 42
+
+
+def test_publish_post_uploads_images_and_links_terms(tmp_path):
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'diagram.png').write_bytes(b'\x89PNG fake')
+    (tmp_path / 'images' / 'cover.jpg').write_bytes(b'\xff\xd8 fake')
+    md_path = tmp_path / 'post.md'
+    md_path.write_text(
+        "---\n"
+        "title: Async Post\n"
+        "categories: [Guides]\n"
+        "tags: [python, 2024]\n"
+        "featured_image: images/cover.jpg\n"
+        "---\n"
+        "# Async Post\n\n"
+        "![A diagram](images/diagram.png)\n\n"
+        "![Remote](https://example.com/remote.png)\n",
+        encoding='utf-8'
+    )
+    fake = FakeWordPress()
+    result = _run(fake, lambda wp: wp.publish_post(str(md_path), use_elementor=True))
+
+    assert result['success']
+    assert sorted(image['filename'] for image in result['uploaded_images']) == ['cover.jpg', 'diagram.png']
+    media_ids = {image['filename']: image['id'] for image in result['uploaded_images']}
+
+    post = fake.posts[0]
+    assert post['title'] == 'Async Post'
+    assert post['status'] == 'draft'
+    assert post['featured_media'] == media_ids['cover.jpg']
+    assert f'{SITE}/wp-content/uploads/diagram.png' in post['content']
+    assert 'https://example.com/remote.png' in post['content']
+    assert len(post['categories']) == 1 and len(post['tags']) == 2
+    assert {t['name'] for t in fake.terms['tags']} == {'python', '2024'}
+    assert json.loads(post['meta']['_elementor_data'])[0]['elType'] == 'section'
+    # Alt text set only where the markdown gave one
+    alt_updates = [r for r in fake.requests if '/media/' in r[1]]
+    assert len(alt_updates) == 1
+
+
+def test_publish_posts_creates_a_shared_new_tag_once(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'post{i}.md'
+        path.write_text(f"---\ntitle: Post {i}\ntags: [Shared, post{i}]\n---\nBody {i}\n", encoding='utf-8')
+        paths.append(str(path))
+    fake = FakeWordPress()
+    results = _run(fake, lambda wp: wp.publish_posts(paths, status='publish'))
+
+    assert [r['title'] for r in results] == ['Post 0', 'Post 1', 'Post 2']
+    assert all(r['status'] == 'publish' for r in results)
+    assert sorted(t['name'] for t in fake.terms['tags']) == ['Shared', 'post0', 'post1', 'post2']
+    assert len(fake.term_creates('tags')) == 4
+    shared_id = next(t['id'] for t in fake.terms['tags'] if t['name'] == 'Shared')
+    assert all(shared_id in post['tags'] for post in fake.posts)
@@ -0,0 +1,113 @@
+"""
+Tests for the semantic response cache
+"""
+import numpy as np
+import pytest
+
+from llm_cache import SemanticCache
+
+
+def _vector(i, dimensions=8):
+    """Unit vectors that are orthogonal to each other (similarity 0)"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+def test_similar_embedding_hits_and_dissimilar_misses():
+    cache = SemanticCache(threshold=0.9)
+    cache.set(_vector(0), 'scope', 'answer')
+    assert cache.get(_vector(0) + 0.01 * _vector(1), 'scope') == 'answer'
+    assert cache.get(_vector(1), 'scope') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_scopes_are_isolated():
+    cache = SemanticCache()
+    cache.set(_vector(0), 'model-a', 'from a')
+    assert cache.get(_vector(0), 'model-b') is None
+    cache.set(_vector(0), 'model-b', 'from b')
+    assert cache.get(_vector(0), 'model-a') == 'from a'
+    assert cache.get(_vector(0), 'model-b') == 'from b'
+
+
+def test_full_cache_overwrites_oldest():
+    cache = SemanticCache(max_entries=3)
+    for i in range(5):
+        cache.set(_vector(i), 'scope', f'v{i}')
+    assert [cache.get(_vector(i), 'scope') for i in range(5)] == [None, None, 'v2', 'v3', 'v4']
+    assert cache.stats()['entries'] == 3
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('llm_cache.time.time', lambda: now[0])
+    cache = SemanticCache(ttl_seconds=60)
+    cache.set(_vector(0), 'scope', 'answer')
+    now[0] += 59
+    assert cache.get(_vector(0), 'scope') == 'answer'
+    now[0] += 2
+    assert cache.get(_vector(0), 'scope') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_embedding_size_change_starts_over():
+    cache = SemanticCache()
+    cache.set(_vector(0, dimensions=8), 'scope', 'old model')
+    cache.set(_vector(0, dimensions=4), 'scope', 'new model')
+    assert cache.get(_vector(0, dimensions=8), 'scope') is None
+    assert cache.get(_vector(0, dimensions=4), 'scope') == 'new model'
+    assert cache.stats()['entries'] == 1
+
+
+def test_reload_after_close(tmp_path):
+    cache = SemanticCache(str(tmp_path), max_entries=4)
+    for i in range(6):
+        cache.set(_vector(i), 'scope', f'v{i}')
+    cache.close()
+
+    reloaded = SemanticCache(str(tmp_path), max_entries=4)
+    assert [reloaded.get(_vector(i), 'scope') for i in range(6)] == [None, None, 'v2', 'v3', 'v4', 'v5']
+    # Slots were renumbered on load, so the next insert replaces the oldest entry (v2)
+    reloaded.set(_vector(6), 'scope', 'v6')
+    reloaded.close()
+
+    again = SemanticCache(str(tmp_path), max_entries=4)
+    assert [again.get(_vector(i), 'scope') for i in range(7)] == [None, None, None, 'v3', 'v4', 'v5', 'v6']
+    again.close()
+
+
+def test_reload_keeps_newest_when_max_entries_shrinks(tmp_path):
+    cache = SemanticCache(str(tmp_path), max_entries=4)
+    for i in range(4):
+        cache.set(_vector(i), 'scope', f'v{i}')
+    cache.close()
+
+    smaller = SemanticCache(str(tmp_path), max_entries=2)
+    assert [smaller.get(_vector(i), 'scope') for i in range(4)] == [None, None, 'v2', 'v3']
+    smaller.close()
+
+
+def test_reload_drops_expired_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('llm_cache.time.time', lambda: now[0])
+    cache = SemanticCache(str(tmp_path), ttl_seconds=60)
+    cache.set(_vector(0), 'scope', 'stale')
+    now[0] += 30
+    cache.set(_vector(1), 'scope', 'fresh')
+    cache.close()
+
+    now[0] += 40
+    reloaded = SemanticCache(str(tmp_path), ttl_seconds=60)
+    assert reloaded.get(_vector(0), 'scope') is None
+    assert reloaded.get(_vector(1), 'scope') == 'fresh'
+    assert reloaded.stats()['entries'] == 1
+    reloaded.close()
+
+
+@pytest.mark.parametrize('scale', [1.0, 10.0])
+def test_embeddings_are_normalized(scale):
+    cache = SemanticCache(threshold=0.99)
+    cache.set(_vector(0) * scale, 'scope', 'answer')
+    assert cache.get(_vector(0), 'scope') == 'answer'
@@ -0,0 +1,160 @@
+"""
+Equivalence checks for the hand-written scanners in markdown_parser
+
+Each fast path is compared with the straightforward implementation it
+replaced: the image regex, frontmatter.loads() and regex alternation.
+"""
+import random
+import re
+
+import frontmatter
+import pytest
+
+import markdown_parser
+from markdown_parser import MarkdownParser, _scan_images
+
+# The image pattern get_image_references() used before _scan_images
+IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^\)]+?)(?:\s+"([^"]*)")?\)')
+
+IMAGE_CASES = [
+    '',
+    '![alt](a.png)',
+    '![alt](a.png "Title")',
+    '![alt](a b.png)',
+    '![alt](a.png "unclosed)',
+    '![unclosed alt(a.png)',
+    '![alt](unclosed.png',
+    '![',
+    '![]()',
+    '![](a.png)',
+    '![a [nested] b](a.png)',
+    '![a](b)(c)',
+    '![![inner](x.png)](y.png)',
+    '![a](x "t1" "t2")',
+    '![a](x  "t")',
+    '![a](x\t"t")',
+    '![a](x\n"t")',
+    '![a](\n)',
+    '![a](x "")',
+    '!![a](x.png)',
+    '! [a](x.png)',
+    '![a](x.png)![b](y.png)',
+    'text ![one](1.png) more ![two](2.png "T") end',
+    '![a]\n(x.png)',
+    '![a](x "t"y")',
+    '![a](x "　")',
+]
+
+
+def _regex_images(content):
+    return [(m.group(1), m.group(2), m.group(3), m.start(), m.end()) for m in IMAGE_RE.finditer(content)]
+
+
+@pytest.mark.parametrize('content', IMAGE_CASES)
+def test_scan_images_matches_regex(content):
+    assert _scan_images(content) == _regex_images(content)
+
+
+def test_scan_images_matches_regex_on_random_input():
+    alphabet = ['!', '[', ']', '(', ')', '"', ' ', '\n', 'a', '\t', '![', '](', ' "', '")']
+    rng = random.Random(1)
+    for _ in range(20000):
+        content = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert _scan_images(content) == _regex_images(content), content
+
+
+FRONTMATTER_CASES = [
+    'plain text',
+    '# Title\n\nBody',
+    '---\ntitle: x\n---\nbody',
+    '---\ntitle: x\n---\n',
+    '---\r\ntitle: x\r\n---\r\nbody',
+    '  \n---\ntitle: x\n---\nbody',
+    '\n\n---\ntitle: x\n---\nbody',
+    'body\n\n---\n\nmore body',
+    'body\n---\ntitle: x\n---\n',
+    '# Title\n\n---\n\nA horizontal rule above',
+    '----\ntitle: x\n----\nbody',
+    '---   \ntitle: x\n---\nbody',
+    '---\nnot: [closed\n',
+    '---',
+    '+++\ntitle = "x"\n+++\nbody',
+    '{"title": "x"}\nbody',
+    '}\nbody',
+    'x\r\n---\r\n',
+    '\r\n\r\n---\r\ntitle: x\r\n---\r\n',
+]
+
+
+def _library_parse(content):
+    try:
+        post = frontmatter.loads(content)
+    except Exception as e:
+        return type(e)
+    return dict(post.metadata), post.content
+
+
+def _parser_parse(content):
+    try:
+        parser = MarkdownParser(markdown_content=content)
+    except Exception as e:
+        return type(e)
+    return parser.metadata, parser.content
+
+
+@pytest.mark.parametrize('content', FRONTMATTER_CASES)
+def test_frontmatter_skip_matches_library(content):
+    assert _parser_parse(content) == _library_parse(content)
+
+
+def test_frontmatter_skip_matches_library_on_random_input():
+    pieces = ['---', '---\n', '\n', '+++', '{', '}', 'a: 1', '\r\n', '  ', 'title: x', '# h', '\r', 'x', '----']
+    rng = random.Random(2)
+    for _ in range(5000):
+        content = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 10)))
+        assert _parser_parse(content) == _library_parse(content), content
+
+
+def _regex_replace(content, image_map):
+    pattern = re.compile('|'.join(re.escape(path) for path in sorted(image_map, key=len, reverse=True)))
+    return pattern.sub(lambda m: image_map[m.group(0)], content)
+
+
+REPLACE_CASES = [
+    ('![a](images/a.png) ![b](a.png)', {'a.png': 'A', 'images/a.png': 'IA'}),
+    ('abcd', {'ab': '1', 'bc': '2', 'abc': '3', 'cd': '4'}),
+    ('aaaa', {'a': 'x', 'aa': 'y'}),
+    ('xabcabx', {'abc': '1', 'cab': '2', 'b': '3'}),
+    ('![a](p.png)', {'p.png': 'p.png'}),
+    ('![a](p.png)', {'p.png': 'q.png', 'q.png': 'r.png'}),
+    ('nothing here', {'missing.png': 'x'}),
+]
+
+# Pads a map past _AHO_MIN_PATHS with paths that never occur in the content
+FILLER = {f'filler-{i}.png': f'F{i}' for i in range(64)}
+
+
+@pytest.mark.parametrize('content, image_map', REPLACE_CASES)
+def test_replace_image_references_regex_path(content, image_map, monkeypatch):
+    monkeypatch.setattr(markdown_parser, 'ahocorasick', None)
+    parser = MarkdownParser(markdown_content=content)
+    assert parser.replace_image_references(image_map) == _regex_replace(content, image_map)
+
+
+@pytest.mark.parametrize('content, image_map', REPLACE_CASES)
+def test_replace_image_references_automaton_path(content, image_map):
+    pytest.importorskip('ahocorasick')
+    image_map = {**FILLER, **image_map}
+    parser = MarkdownParser(markdown_content=content)
+    assert parser.replace_image_references(image_map) == _regex_replace(content, image_map)
+
+
+def test_replace_image_references_automaton_on_random_input():
+    pytest.importorskip('ahocorasick')
+    rng = random.Random(3)
+    for _ in range(500):
+        content = ''.join(rng.choice('ab/.') for _ in range(rng.randint(0, 30)))
+        paths = {''.join(rng.choice('ab/.') for _ in range(rng.randint(1, 4))) for _ in range(5)}
+        image_map = {**FILLER, **{path: f'<{i}>' for i, path in enumerate(paths)}}
+        parser = MarkdownParser(markdown_content=content or 'x')
+        assert parser.replace_image_references(image_map) == _regex_replace(parser.content, image_map)
@@ -0,0 +1,65 @@
+"""
+Tests for the OpenAI RPM/TPM token bucket
+"""
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic() for the limiter"""
+    now = [100.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_requests_within_budget_do_not_wait(clock):
+    limiter = RateLimiter(rpm=2, tpm=1000)
+    assert limiter._try_acquire(400) == 0.0
+    assert limiter._try_acquire(400) == 0.0
+
+
+def test_empty_request_bucket_waits_for_one_request(clock):
+    limiter = RateLimiter(rpm=60, tpm=10**6)
+    for _ in range(60):
+        assert limiter._try_acquire(1) == 0.0
+    # 60 RPM refills one request per second
+    assert limiter._try_acquire(1) == pytest.approx(1.0)
+    clock[0] += 0.5
+    assert limiter._try_acquire(1) == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert limiter._try_acquire(1) == 0.0
+
+
+def test_token_bucket_wait_matches_refill_rate(clock):
+    limiter = RateLimiter(rpm=1000, tpm=6000)
+    assert limiter._try_acquire(6000) == 0.0
+    # 6000 TPM refills 100 tokens per second
+    assert limiter._try_acquire(300) == pytest.approx(3.0)
+    clock[0] += 3.0
+    assert limiter._try_acquire(300) == 0.0
+
+
+def test_request_larger_than_bucket_waits_for_full_bucket(clock):
+    limiter = RateLimiter(rpm=1000, tpm=600)
+    assert limiter._try_acquire(5000) == 0.0
+    assert limiter._try_acquire(5000) == pytest.approx(60.0)
+
+
+def test_failed_acquire_takes_nothing(clock):
+    limiter = RateLimiter(rpm=1000, tpm=100)
+    assert limiter._try_acquire(80) == 0.0
+    assert limiter._try_acquire(50) > 0
+    # The refused request left the remaining 20 tokens in place
+    assert limiter._try_acquire(20) == 0.0
+
+
+def test_shared_limiter_splits_budget_across_workers(monkeypatch):
+    monkeypatch.setattr(rate_limiter, '_shared_limiter', None)
+    monkeypatch.setenv('WEB_WORKERS', '4')
+    monkeypatch.setenv('OPENAI_RPM', '500')
+    monkeypatch.setenv('OPENAI_TPM', '200000')
+    limiter = rate_limiter.shared_rate_limiter()
+    assert (limiter.rpm, limiter.tpm) == (125, 50000)
@@ -0,0 +1,121 @@
+"""
+Tests for wp_client against a local fake WordPress host
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+import wp_client
+from wp_client import RETRY_POLICY, WordPressClient
+
+
+class FakeHost:
+    """Threaded HTTP server that answers with a scripted list of responses"""
+
+    def __init__(self):
+        self.requests = []
+        self.script = []  # (status, headers, delay) per request; the last entry repeats
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                host.requests.append((self.command, self.path, self.rfile.read(length)))
+                status, headers, delay = host.script[min(len(host.requests), len(host.script)) - 1]
+                time.sleep(delay)
+                body = json.dumps({'id': len(host.requests), 'link': 'https://example.com/p'}).encode()
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (read timeout)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def host():
+    fake = FakeHost()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def session():
+    """Session with RETRY_POLICY minus the backoff delays"""
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=RETRY_POLICY.new(backoff_factor=0))
+    session.mount('http://', adapter)
+    return session
+
+
+def test_post_is_not_retried_on_500(host, session):
+    host.script = [(500, {}, 0)]
+    client = WordPressClient(host.url, 'user', 'pass', session=session)
+    result = client.create_post('Title', '<p>Body</p>')
+    assert not result['success']
+    assert len(host.requests) == 1
+
+
+def test_post_is_not_retried_on_503_without_retry_after(host, session):
+    host.script = [(503, {}, 0)]
+    assert session.post(host.url + '/wp-json/wp/v2/posts', data=b'{}').status_code == 503
+    assert len(host.requests) == 1
+
+
+def test_slow_post_is_not_retried(host, session):
+    host.script = [(201, {}, 0.5)]
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.post(host.url + '/wp-json/wp/v2/posts', data=b'{}', timeout=0.1)
+    assert len(host.requests) == 1
+
+
+def test_post_is_retried_on_503_with_retry_after(host, session):
+    host.script = [(503, {'Retry-After': '0'}, 0), (503, {'Retry-After': '0'}, 0), (201, {}, 0)]
+    response = session.post(host.url + '/wp-json/wp/v2/posts', data=b'{"title": "t"}')
+    assert response.status_code == 201
+    assert [method for method, _, _ in host.requests] == ['POST'] * 3
+    assert {body for _, _, body in host.requests} == {b'{"title": "t"}'}
+
+
+def test_get_is_retried_on_500(host, session):
+    host.script = [(500, {}, 0)]
+    assert session.get(host.url + '/wp-json/wp/v2/tags').status_code == 500
+    assert len(host.requests) == RETRY_POLICY.total + 1
+
+
+def test_long_retry_after_is_capped():
+    response = HTTPResponse(body=b'', status=429, headers={'Retry-After': '3600'})
+    assert RETRY_POLICY.get_retry_after(response) == wp_client._RETRY_AFTER_MAX
+    response = HTTPResponse(body=b'', status=429, headers={'Retry-After': '2'})
+    assert RETRY_POLICY.get_retry_after(response) == 2
+
+
+def test_term_lookup_survives_unexpected_json_object(host, session):
+    # e.g. a security plugin answering 200 {"code": ...} instead of a term list
+    host.script = [(200, {}, 0)]
+    client = WordPressClient(host.url, 'user', 'pass', session=session)
+    assert client.get_or_create_category('News') is None
+    assert client.resolve_terms_batch(['python', 'News'], 'tags') == [None, None]
@@ -3,17 +3,174 @@ WordPress REST API Client
 Handles authentication, media uploads, and post creation with SEO/Elementor support
 """
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+import asyncio
+import httpx
 import mimetypes
 import os
 import json
-from typing import Dict, List, Optional, BinaryIO
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, BinaryIO, Union
+
+from markdown_parser import MarkdownParser, term_names
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding of large Elementor payloads
+    orjson = None
+
+
+# Category/tag IDs shared by all clients in the process, keyed by (site, kind, lower-cased name)
+_TERM_CACHE_TTL = 3600
+_TERM_CACHE_MAX = 10000
+_TERM_CACHE = {}
+_TERM_SEEDED = {}  # (site, kind) -> time of the last bulk fetch
+_TERM_CACHE_LOCK = threading.Lock()
+
+# Approximation of WordPress's sanitize_title() for batch slug lookups
+_SLUG_STRIP = re.compile(r'[^a-z0-9]+')
+
+# Failures a category/tag lookup reports and survives: request errors, and
+# response bodies of the wrong shape (e.g. a security plugin's JSON object
+# where a list of terms was expected)
+_TERM_ERRORS = (requests.RequestException, ValueError, KeyError, TypeError, AttributeError)
+_ASYNC_TERM_ERRORS = (httpx.HTTPError, ValueError, KeyError, TypeError, AttributeError)
+
+# Longest Retry-After (seconds) a retry will wait before trying again
+_RETRY_AFTER_MAX = 30
+
+
+class _WordPressRetry(Retry):
+    """
+    Retry that never repeats a POST WordPress may already have applied
+
+    A POST creates a post, term or media item, so it is only retried when
+    the server cannot have processed it: connection errors, and 429/503
+    responses that carry a Retry-After header. Retry-After waits are capped
+    at _RETRY_AFTER_MAX seconds so a host can't park a worker thread for hours.
+    """
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST':
+            return bool(self.total and has_retry_after and status_code in (429, 503))
+        return super().is_retry(method, status_code, has_retry_after)
+    
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, _RETRY_AFTER_MAX)
+
+
+# Transport-level retries for flaky hosts: connection errors and throttling/gateway
+# statuses, with exponential backoff. Read errors are never retried, since the
+# request may already have been handled. The last response is returned rather
+# than raised so callers still report the WordPress status and body.
+RETRY_POLICY = _WordPressRetry(
+    total=5,
+    read=False,
+    backoff_factor=0.5,
+    status_forcelist={429, 500, 502, 503, 504},
+    allowed_methods={'GET', 'PUT'},  # POST is handled by _WordPressRetry.is_retry
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+# How long a client trusts a successful validate_credentials() before asking again
+_CREDENTIALS_TTL = 300
+
+
+def _json_bytes(obj) -> bytes:
+    """Encode a JSON request body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _lookup_term(site_url: str, kind: str, name: str) -> Optional[int]:
+    """Cached category/tag ID, or None if unknown or expired"""
+    with _TERM_CACHE_LOCK:
+        entry = _TERM_CACHE.get((site_url, kind, name.lower()))
+    if entry and time.time() - entry[0] < _TERM_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+def _store_term(site_url: str, kind: str, name: str, term_id: int) -> None:
+    """Store a category/tag ID in the process-wide cache"""
+    with _TERM_CACHE_LOCK:
+        key = (site_url, kind, name.lower())
+        _TERM_CACHE.pop(key, None)
+        _TERM_CACHE[key] = (time.time(), term_id)
+        while len(_TERM_CACHE) > _TERM_CACHE_MAX:
+            # dicts keep insertion order, so the first key is the oldest
+            del _TERM_CACHE[next(iter(_TERM_CACHE))]
+
+
+def _claim_term_seed(site_url: str, kind: str) -> bool:
+    """True if the caller should fetch the site's term list (at most once per TTL)"""
+    seed_key = (site_url, kind)
+    with _TERM_CACHE_LOCK:
+        seeded_at = _TERM_SEEDED.get(seed_key)
+        if seeded_at and time.time() - seeded_at < _TERM_CACHE_TTL:
+            return False
+        # Mark first so concurrent lookups fall back to searching instead of refetching
+        _TERM_SEEDED[seed_key] = time.time()
+        return True
+
+
+def _post_payload(title: str, content: str, status: str, featured_media: Optional[int],
+                  categories: Optional[List[int]], tags: Optional[List[int]],
+                  excerpt: Optional[str], meta: Optional[Dict],
+                  elementor_data: Optional[List]) -> Dict:
+    """Build the /wp/v2/posts request body shared by both clients"""
+    post_data = {
+        'title': title,
+        'content': content,
+        'status': status
+    }
+    
+    # Optional fields
+    if featured_media:
+        post_data['featured_media'] = featured_media
+    if categories:
+        post_data['categories'] = categories
+    if tags:
+        post_data['tags'] = tags
+    if excerpt:
+        post_data['excerpt'] = excerpt
+    
+    # Meta fields (SEO, custom fields, Elementor)
+    if meta or elementor_data:
+        post_data['meta'] = meta or {}
+        
+        # Add Elementor data if provided (must be JSON string)
+        if elementor_data:
+            post_data['meta']['_elementor_data'] = _json_bytes(elementor_data).decode('utf-8')
+            post_data['meta']['_elementor_edit_mode'] = 'builder'
+            post_data['meta']['_elementor_template_type'] = 'wp-post'
+    
+    return post_data
+
+
+def _pooled_session() -> requests.Session:
+    """Session with keep-alive pooling and RETRY_POLICY"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=RETRY_POLICY)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class WordPressClient:
     """Client for interacting with WordPress REST API"""
     
-    def __init__(self, site_url: str, username: str, password: str):
+    def __init__(self, site_url: str, username: str, password: str,
+                 session: Optional[requests.Session] = None):
         """
         Initialize WordPress client
         
@@ -21,29 +178,40 @@ class WordPressClient:
             site_url: WordPress site URL (e.g., 'https://example.com')
             username: WordPress admin username
             password: WordPress application password
+            session: Shared requests.Session for connection reuse (a new pooled one if not provided)
         """
         self.site_url = site_url.rstrip('/')
         self.username = username
         self.password = password
         self.auth = HTTPBasicAuth(username, password)
+        # auth stays per call: a shared session may serve other WordPress users
+        self.session = session or _pooled_session()
+        self._validated = None  # (checked_at, result) of the last successful validation
         
     def validate_credentials(self) -> Dict:
         """
         Validate WordPress credentials by fetching current user info
         
+        Successful results are reused for a few minutes; failures are always rechecked.
+        
         Returns:
             dict with status and user info or error message
         """
+        if self._validated and time.time() - self._validated[0] < _CREDENTIALS_TTL:
+            return dict(self._validated[1])
+        
         endpoint = f"{self.site_url}/wp-json/wp/v2/users/me"
         try:
-            response = requests.get(endpoint, auth=self.auth, timeout=10)
+            response = self.session.get(endpoint, auth=self.auth, timeout=10)
             if response.status_code == 200:
                 user_data = response.json()
-                return {
+                result = {
                     'success': True,
                     'user': user_data.get('name'),
                     'id': user_data.get('id')
                 }
+                self._validated = (time.time(), result)
+                return dict(result)
             else:
                 return {
                     'success': False,
@@ -76,12 +244,13 @@ class WordPressClient:
             if not os.path.exists(file_path):
                 return {'success': False, 'error': f'File not found: {file_path}'}
             filename = os.path.basename(file_path)
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            # Streamed from disk during the POST; closed once the upload finishes
+            file_data = open(file_path, 'rb')
         elif file_obj:
             if not filename:
                 return {'success': False, 'error': 'filename required when using file_obj'}
-            file_data = file_obj.read()
+            # requests streams file-like bodies in blocks instead of us buffering them
+            file_data = file_obj
         else:
             return {'success': False, 'error': 'Either file_path or file_obj must be provided'}
         
@@ -94,9 +263,11 @@ class WordPressClient:
             'Content-Type': mime_type,
             'Content-Disposition': f'attachment; filename="{filename}"'
         }
+        if file_path:
+            headers['Content-Length'] = str(os.path.getsize(file_path))
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 endpoint,
                 headers=headers,
                 data=file_data,
@@ -128,19 +299,47 @@ class WordPressClient:
                 'success': False,
                 'error': f"Upload error: {str(e)}"
             }
+        finally:
+            if file_path:
+                file_data.close()
+    
+    def upload_media_batch(self, files: List[Union[str, Dict]], max_workers: int = 8,
+                           executor: Optional[Executor] = None) -> List[Dict]:
+        """
+        Upload several media files concurrently
+        
+        Args:
+            files: File paths, or dicts of upload_media keyword arguments
+                (file_obj, filename, alt_text)
+            max_workers: Thread count when no executor is given
+            executor: Shared executor to run the uploads on (a temporary pool if not provided)
+            
+        Returns:
+            upload_media results, in the order the files were given
+        """
+        def upload(item):
+            if isinstance(item, str):
+                return self.upload_media(file_path=item)
+            return self.upload_media(**item)
+        
+        if executor is not None:
+            return list(executor.map(upload, files))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(upload, files))
     
     def _update_media_alt_text(self, media_id: int, alt_text: str) -> bool:
         """Update alt text for a media item"""
         endpoint = f"{self.site_url}/wp-json/wp/v2/media/{media_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 endpoint,
                 json={'alt_text': alt_text},
                 auth=self.auth,
                 timeout=10
             )
             return response.status_code == 200
-        except:
+        except requests.RequestException as e:
+            logging.warning(f"Failed to set alt text on media {media_id}: {str(e)}")
             return False
     
     def create_post(self, title: str, content: str, 
@@ -169,37 +368,14 @@ class WordPressClient:
             dict with post ID, URL, and status or error
         """
         endpoint = f"{self.site_url}/wp-json/wp/v2/posts"
-        
-        post_data = {
-            'title': title,
-            'content': content,
-            'status': status
-        }
-        
-        # Optional fields
-        if featured_media:
-            post_data['featured_media'] = featured_media
-        if categories:
-            post_data['categories'] = categories
-        if tags:
-            post_data['tags'] = tags
-        if excerpt:
-            post_data['excerpt'] = excerpt
-        
-        # Meta fields (SEO, custom fields, Elementor)
-        if meta or elementor_data:
-            post_data['meta'] = meta or {}
-            
-            # Add Elementor data if provided (must be JSON string)
-            if elementor_data:
-                post_data['meta']['_elementor_data'] = json.dumps(elementor_data)
-                post_data['meta']['_elementor_edit_mode'] = 'builder'
-                post_data['meta']['_elementor_template_type'] = 'wp-post'
+        post_data = _post_payload(title, content, status, featured_media, categories,
+                                  tags, excerpt, meta, elementor_data)
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 endpoint,
-                json=post_data,
+                data=_json_bytes(post_data),
+                headers={'Content-Type': 'application/json'},
                 auth=self.auth,
                 timeout=30
             )
@@ -234,28 +410,36 @@ class WordPressClient:
         Returns:
             Category ID or None if error
         """
+        category_name = str(category_name)
+        cached_id = self._cached_term_id('categories', category_name)
+        if cached_id:
+            return cached_id
+        
         # Search for existing category
         search_endpoint = f"{self.site_url}/wp-json/wp/v2/categories?search={category_name}"
         try:
-            response = requests.get(search_endpoint, auth=self.auth, timeout=10)
+            response = self.session.get(search_endpoint, auth=self.auth, timeout=10)
             if response.status_code == 200:
-                categories = response.json()
-                for cat in categories:
-                    if cat['name'].lower() == category_name.lower():
-                        return cat['id']
+                needle = category_name.lower()
+                cat_id = next((cat['id'] for cat in response.json() if cat['name'].lower() == needle), None)
+                if cat_id:
+                    _store_term(self.site_url, 'categories', category_name, cat_id)
+                    return cat_id
             
             # Create new category
             create_endpoint = f"{self.site_url}/wp-json/wp/v2/categories"
-            response = requests.post(
+            response = self.session.post(
                 create_endpoint,
                 json={'name': category_name},
                 auth=self.auth,
                 timeout=10
             )
             if response.status_code == 201:
-                return response.json()['id']
-        except:
-            pass
+                term_id = response.json()['id']
+                _store_term(self.site_url, 'categories', category_name, term_id)
+                return term_id
+        except _TERM_ERRORS as e:
+            logging.warning(f"Category lookup failed for {category_name!r}: {str(e)}")
         return None
     
     def get_or_create_tag(self, tag_name: str) -> Optional[int]:
@@ -268,26 +452,592 @@ class WordPressClient:
         Returns:
             Tag ID or None if error
         """
+        tag_name = str(tag_name)
+        cached_id = self._cached_term_id('tags', tag_name)
+        if cached_id:
+            return cached_id
+        
         # Search for existing tag
         search_endpoint = f"{self.site_url}/wp-json/wp/v2/tags?search={tag_name}"
         try:
-            response = requests.get(search_endpoint, auth=self.auth, timeout=10)
+            response = self.session.get(search_endpoint, auth=self.auth, timeout=10)
             if response.status_code == 200:
-                tags = response.json()
-                for tag in tags:
-                    if tag['name'].lower() == tag_name.lower():
-                        return tag['id']
+                needle = tag_name.lower()
+                tag_id = next((tag['id'] for tag in response.json() if tag['name'].lower() == needle), None)
+                if tag_id:
+                    _store_term(self.site_url, 'tags', tag_name, tag_id)
+                    return tag_id
             
             # Create new tag
             create_endpoint = f"{self.site_url}/wp-json/wp/v2/tags"
-            response = requests.post(
+            response = self.session.post(
                 create_endpoint,
                 json={'name': tag_name},
                 auth=self.auth,
                 timeout=10
             )
             if response.status_code == 201:
-                return response.json()['id']
-        except:
-            pass
+                term_id = response.json()['id']
+                _store_term(self.site_url, 'tags', tag_name, term_id)
+                return term_id
+        except _TERM_ERRORS as e:
+            logging.warning(f"Tag lookup failed for {tag_name!r}: {str(e)}")
         return None
+    
+    def resolve_terms_batch(self, names: List[str], kind: str, max_workers: int = 4,
+                            executor: Optional[Executor] = None) -> List[Optional[int]]:
+        """
+        Get or create several categories/tags concurrently
+        
+        Names already known from the site's term list are answered without a
+        request; the rest are searched and created in parallel.
+        
+        Args:
+            names: Term names (non-string names are converted, empty ones skipped)
+            kind: 'categories' or 'tags'
+            max_workers: Thread count when no executor is given
+            executor: Shared executor to run the lookups on (a temporary pool if not provided)
+            
+        Returns:
+            Term IDs (None where lookup and creation failed), in the order given
+        """
+        names = term_names(names)
+        get_or_create = self.get_or_create_category if kind == 'categories' else self.get_or_create_tag
+        ids = [self._cached_term_id(kind, name) for name in names]
+        
+        # One request per distinct name, so 'Dup' and 'dup' don't race to create the same term
+        missing = {}
+        for name, term_id in zip(names, ids):
+            if not term_id:
+                missing.setdefault(name.lower(), name)
+        if not missing:
+            return ids
+        
+        if executor is not None:
+            found = dict(zip(missing, executor.map(get_or_create, missing.values())))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                found = dict(zip(missing, pool.map(get_or_create, missing.values())))
+        return [term_id or found[name.lower()] for name, term_id in zip(names, ids)]
+    
+    def _cached_term_id(self, kind: str, name: str) -> Optional[int]:
+        """
+        Look up a category/tag ID in the process-wide cache
+        
+        The first lookup for a site fetches its 100 most used terms in one
+        request, so common names never need a search.
+        
+        Args:
+            kind: 'categories' or 'tags'
+            name: Term name (case-insensitive)
+        """
+        self._seed_terms(kind)
+        return _lookup_term(self.site_url, kind, name)
+    
+    def _seed_terms(self, kind: str) -> None:
+        """Fill the term cache from one paginated list request per site and kind"""
+        if not _claim_term_seed(self.site_url, kind):
+            return
+        
+        endpoint = f"{self.site_url}/wp-json/wp/v2/{kind}"
+        try:
+            response = self.session.get(
+                endpoint,
+                params={'per_page': 100, 'orderby': 'count', 'order': 'desc'},
+                auth=self.auth,
+                timeout=10
+            )
+            if response.status_code == 200:
+                for term in response.json():
+                    _store_term(self.site_url, kind, term['name'], term['id'])
+        except _TERM_ERRORS as e:
+            logging.warning(f"Fetching the {kind} list failed: {str(e)}")
+
+
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def elementor_text_layout(html_content: str) -> List:
+    """Single text-editor widget holding the post HTML (editable in Elementor afterwards)"""
+    return [
+        {
+            "id": "content",
+            "elType": "section",
+            "elements": [
+                {
+                    "id": "column",
+                    "elType": "column",
+                    "elements": [
+                        {
+                            "id": "text",
+                            "elType": "widget",
+                            "widgetType": "text-editor",
+                            "settings": {
+                                "editor": html_content
+                            }
+                        }
+                    ]
+                }
+            ]
+        }
+    ]
+
+
+class AsyncWordPressClient:
+    """
+    asyncio counterpart of WordPressClient over an HTTP/2 httpx.AsyncClient
+    
+    Lets one event loop run many media uploads and term lookups at once.
+    Shares the process-wide category/tag cache with WordPressClient.
+    
+    Usage:
+        async with AsyncWordPressClient(site, user, password) as wp:
+            result = await wp.publish_post('post.md')
+    """
+    
+    def __init__(self, site_url: str, username: str, password: str,
+                 client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize async WordPress client
+        
+        Args:
+            site_url: WordPress site URL (e.g., 'https://example.com')
+            username: WordPress admin username
+            password: WordPress application password
+            client: httpx.AsyncClient to send requests with (a new HTTP/2 one if not provided)
+        """
+        self.site_url = site_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.auth = httpx.BasicAuth(username, password)
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    
+    async def __aenter__(self) -> 'AsyncWordPressClient':
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the underlying httpx client if this instance created it"""
+        if self._owns_client:
+            await self.client.aclose()
+    
+    async def validate_credentials(self) -> Dict:
+        """
+        Validate WordPress credentials by fetching current user info
+        
+        Returns:
+            dict with status and user info or error message
+        """
+        endpoint = f"{self.site_url}/wp-json/wp/v2/users/me"
+        try:
+            response = await self.client.get(endpoint, auth=self.auth, timeout=10)
+            if response.status_code == 200:
+                user_data = response.json()
+                return {
+                    'success': True,
+                    'user': user_data.get('name'),
+                    'id': user_data.get('id')
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': f"Authentication failed: {response.status_code} - {response.reason_phrase}"
+                }
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'error': f"Connection error: {str(e)}"
+            }
+    
+    async def upload_media(self, file_path: str = None, content: bytes = None,
+                           filename: str = None, alt_text: str = "") -> Dict:
+        """
+        Upload an image/media file to WordPress media library
+        
+        Args:
+            file_path: Path to file on disk (optional if content provided)
+            content: File bytes (optional if file_path provided)
+            filename: Filename to use (required if using content)
+            alt_text: Alt text for accessibility
+            
+        Returns:
+            dict with media ID, URL, and metadata or error
+        """
+        endpoint = f"{self.site_url}/wp-json/wp/v2/media"
+        
+        # Determine file source
+        if file_path:
+            if not os.path.exists(file_path):
+                return {'success': False, 'error': f'File not found: {file_path}'}
+            filename = os.path.basename(file_path)
+            # Read off the event loop so other uploads keep sending meanwhile
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, _read_bytes, file_path)
+        elif content is not None:
+            if not filename:
+                return {'success': False, 'error': 'filename required when using content'}
+        else:
+            return {'success': False, 'error': 'Either file_path or content must be provided'}
+        
+        # Detect MIME type
+        mime_type, _ = mimetypes.guess_type(filename)
+        if not mime_type:
+            mime_type = 'application/octet-stream'
+        
+        headers = {
+            'Content-Type': mime_type,
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }
+        
+        try:
+            response = await self.client.post(endpoint, headers=headers, content=content, auth=self.auth)
+            
+            if response.status_code == 201:
+                media_data = response.json()
+                
+                # Update alt text if provided
+                if alt_text:
+                    await self._update_media_alt_text(media_data['id'], alt_text)
+                
+                return {
+                    'success': True,
+                    'id': media_data['id'],
+                    'url': media_data['source_url'],
+                    'title': media_data['title']['rendered'],
+                    'mime_type': media_data['mime_type']
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': f"Upload failed: {response.status_code} - {response.text}"
+                }
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'error': f"Upload error: {str(e)}"
+            }
+    
+    async def _update_media_alt_text(self, media_id: int, alt_text: str) -> bool:
+        """Update alt text for a media item"""
+        endpoint = f"{self.site_url}/wp-json/wp/v2/media/{media_id}"
+        try:
+            response = await self.client.post(
+                endpoint,
+                json={'alt_text': alt_text},
+                auth=self.auth,
+                timeout=10
+            )
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            logging.warning(f"Failed to set alt text on media {media_id}: {str(e)}")
+            return False
+    
+    async def create_post(self, title: str, content: str,
+                          status: str = 'draft',
+                          featured_media: Optional[int] = None,
+                          categories: Optional[List[int]] = None,
+                          tags: Optional[List[int]] = None,
+                          excerpt: Optional[str] = None,
+                          meta: Optional[Dict] = None,
+                          elementor_data: Optional[List] = None) -> Dict:
+        """
+        Create a WordPress post (same arguments and result as WordPressClient.create_post)
+        """
+        endpoint = f"{self.site_url}/wp-json/wp/v2/posts"
+        post_data = _post_payload(title, content, status, featured_media, categories,
+                                  tags, excerpt, meta, elementor_data)
+        
+        try:
+            response = await self.client.post(
+                endpoint,
+                content=_json_bytes(post_data),
+                headers={'Content-Type': 'application/json'},
+                auth=self.auth
+            )
+            
+            if response.status_code == 201:
+                post_response = response.json()
+                return {
+                    'success': True,
+                    'id': post_response['id'],
+                    'url': post_response['link'],
+                    'status': post_response['status'],
+                    'title': post_response['title']['rendered']
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': f"Post creation failed: {response.status_code} - {response.text}"
+                }
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'error': f"Post creation error: {str(e)}"
+            }
+    
+    async def get_or_create_term(self, kind: str, name: str) -> Optional[int]:
+        """
+        Get a category/tag ID by name, or create it if it doesn't exist
+        
+        Args:
+            kind: 'categories' or 'tags'
+            name: Term name
+            
+        Returns:
+            Term ID or None if error
+        """
+        name = str(name)
+        await self._seed_terms(kind)
+        cached_id = _lookup_term(self.site_url, kind, name)
+        if cached_id:
+            return cached_id
+        
+        endpoint = f"{self.site_url}/wp-json/wp/v2/{kind}"
+        try:
+            # Search for existing term
+            response = await self.client.get(endpoint, params={'search': name}, auth=self.auth, timeout=10)
+            if response.status_code == 200:
+                needle = name.lower()
+                term_id = next((term['id'] for term in response.json() if term['name'].lower() == needle), None)
+                if term_id:
+                    _store_term(self.site_url, kind, name, term_id)
+                    return term_id
+            
+            # Create new term
+            response = await self.client.post(endpoint, json={'name': name}, auth=self.auth, timeout=10)
+            if response.status_code == 201:
+                term_id = response.json()['id']
+                _store_term(self.site_url, kind, name, term_id)
+                return term_id
+        except _ASYNC_TERM_ERRORS as e:
+            logging.warning(f"Term lookup failed for {name!r} in {kind}: {str(e)}")
+        return None
+    
+    async def get_or_create_category(self, category_name: str) -> Optional[int]:
+        """Get category ID by name, or create if doesn't exist"""
+        return await self.get_or_create_term('categories', category_name)
+    
+    async def get_or_create_tag(self, tag_name: str) -> Optional[int]:
+        """Get tag ID by name, or create if doesn't exist"""
+        return await self.get_or_create_term('tags', tag_name)
+    
+    async def resolve_terms(self, names: List[str], kind: str) -> List[Optional[int]]:
+        """Get or create several categories/tags at once, in the order given"""
+        names = term_names(names)
+        ids = await self.resolve_terms_batch(names, kind)
+        return [ids.get(name.lower()) for name in names]
+    
+    async def resolve_terms_batch(self, names: List[str], kind: str) -> Dict[str, Optional[int]]:
+        """
+        Resolve many categories/tags with as few round trips as possible
+        
+        1. The site's 100 most used terms are fetched once (and cached);
+        2. remaining names are looked up together with one ?slug=a,b,c request;
+        3. whatever is still missing is created concurrently.
+        
+        Args:
+            names: Term names (duplicates and case differences are merged; non-string
+                names are converted and empty ones skipped)
+            kind: 'categories' or 'tags'
+            
+        Returns:
+            dict of lower-cased name -> term ID (None where creation failed)
+        """
+        await self._seed_terms(kind)
+        
+        ids = {}
+        missing = {}
+        for name in term_names(names):
+            needle = name.lower()
+            if needle in ids or needle in missing:
+                continue
+            cached_id = _lookup_term(self.site_url, kind, name)
+            if cached_id:
+                ids[needle] = cached_id
+            else:
+                missing[needle] = name
+        
+        slugs = sorted({_SLUG_STRIP.sub('-', needle).strip('-') for needle in missing} - {''})
+        if slugs:
+            endpoint = f"{self.site_url}/wp-json/wp/v2/{kind}"
+            try:
+                response = await self.client.get(
+                    endpoint,
+                    params={'slug': ','.join(slugs), 'per_page': 100},
+                    auth=self.auth,
+                    timeout=10
+                )
+                if response.status_code == 200:
+                    for term in response.json():
+                        needle = term['name'].lower()
+                        if needle in missing:
+                            _store_term(self.site_url, kind, term['name'], term['id'])
+                            ids[needle] = term['id']
+                            del missing[needle]
+            except _ASYNC_TERM_ERRORS as e:
+                logging.warning(f"Batch {kind} lookup failed: {str(e)}")
+        
+        if missing:
+            created = await asyncio.gather(*(self._create_term(kind, name) for name in missing.values()))
+            ids.update(zip(missing, created))
+        return ids
+    
+    async def _create_term(self, kind: str, name: str) -> Optional[int]:
+        """Create a category/tag, accepting WordPress's term_exists answer as success"""
+        endpoint = f"{self.site_url}/wp-json/wp/v2/{kind}"
+        try:
+            response = await self.client.post(endpoint, json={'name': name}, auth=self.auth, timeout=10)
+            data = response.json()
+            if response.status_code == 201:
+                term_id = data['id']
+            elif response.status_code == 400 and data.get('code') == 'term_exists':
+                term_id = data['data']['term_id']
+            else:
+                logging.warning(f"Creating {name!r} in {kind} failed: {response.status_code}")
+                return None
+        except _ASYNC_TERM_ERRORS as e:
+            logging.warning(f"Creating {name!r} in {kind} failed: {str(e)}")
+            return None
+        _store_term(self.site_url, kind, name, term_id)
+        return term_id
+    
+    async def _seed_terms(self, kind: str) -> None:
+        """Fill the term cache from one paginated list request per site and kind"""
+        if not _claim_term_seed(self.site_url, kind):
+            return
+        
+        endpoint = f"{self.site_url}/wp-json/wp/v2/{kind}"
+        try:
+            response = await self.client.get(
+                endpoint,
+                params={'per_page': 100, 'orderby': 'count', 'order': 'desc'},
+                auth=self.auth,
+                timeout=10
+            )
+            if response.status_code == 200:
+                for term in response.json():
+                    _store_term(self.site_url, kind, term['name'], term['id'])
+        except _ASYNC_TERM_ERRORS as e:
+            logging.warning(f"Fetching the {kind} list failed: {str(e)}")
+    
+    async def publish_post(self, md_path: str, status: Optional[str] = None,
+                           use_elementor: bool = False) -> Dict:
+        """
+        Publish a markdown file and the local images it references
+        
+        Images (relative to the markdown file) and categories/tags are all
+        uploaded/resolved concurrently before the post is created.
+        
+        Args:
+            md_path: Path to the markdown file
+            status: Post status (defaults to the frontmatter 'status', else 'draft')
+            use_elementor: Whether to attach Elementor builder data
+            
+        Returns:
+            create_post result, plus 'uploaded_images'
+        """
+        parser = MarkdownParser(markdown_file=md_path)
+        metadata = parser.get_all_metadata()
+        base_dir = os.path.dirname(os.path.abspath(md_path))
+        
+        # Local images referenced in the content, plus the featured image
+        alt_texts = {}
+        for image in parser.get_image_references():
+            alt_texts.setdefault(image['path'], image['alt'])
+        featured_path = metadata['featured_image']
+        if featured_path:
+            alt_texts.setdefault(featured_path, '')
+        local_paths = [
+            path for path in alt_texts
+            if not path.startswith(('http://', 'https://', 'data:'))
+            and os.path.isfile(os.path.join(base_dir, path))
+        ]
+        
+        uploads, category_ids, tag_ids = await asyncio.gather(
+            asyncio.gather(*(
+                self.upload_media(file_path=os.path.join(base_dir, path), alt_text=alt_texts[path])
+                for path in local_paths
+            )),
+            self.resolve_terms(metadata['categories'], 'categories'),
+            self.resolve_terms(metadata['tags'], 'tags')
+        )
+        
+        uploaded_images = []
+        image_map = {}
+        featured_image_id = None
+        for path, upload in zip(local_paths, uploads):
+            if not upload['success']:
+                continue
+            uploaded_images.append({
+                'filename': os.path.basename(path),
+                'id': upload['id'],
+                'url': upload['url']
+            })
+            image_map[path] = upload['url']
+            if path == featured_path:
+                featured_image_id = upload['id']
+        
+        if image_map:
+            parser.content = parser.replace_image_references(image_map)
+        html_content = parser.to_html()
+        
+        # SEO meta fields (for Yoast/RankMath)
+        seo_meta = metadata['seo']
+        post_meta = {}
+        if seo_meta.get('title'):
+            post_meta['_yoast_wpseo_title'] = seo_meta['title']
+        if seo_meta.get('description'):
+            post_meta['_yoast_wpseo_metadesc'] = seo_meta['description']
+        if seo_meta.get('keywords'):
+            post_meta['_yoast_wpseo_focuskw'] = seo_meta.get('focus_keyword', seo_meta['keywords'])
+        
+        category_ids = [cat_id for cat_id in category_ids if cat_id]
+        tag_ids = [tag_id for tag_id in tag_ids if tag_id]
+        result = await self.create_post(
+            title=metadata['title'],
+            content=html_content,
+            status=status or metadata['status'],
+            featured_media=featured_image_id,
+            categories=category_ids or None,
+            tags=tag_ids or None,
+            excerpt=metadata.get('excerpt'),
+            meta=post_meta or None,
+            elementor_data=elementor_text_layout(html_content) if use_elementor else None
+        )
+        result['uploaded_images'] = uploaded_images
+        return result
+    
+    async def publish_posts(self, md_paths: List[str], status: Optional[str] = None,
+                            use_elementor: bool = False) -> List[Dict]:
+        """
+        Publish several markdown files concurrently
+        
+        All categories and tags across the batch are resolved once up front,
+        so posts sharing a new tag don't race to create it.
+        
+        Returns:
+            publish_post results, in the order the files were given
+        """
+        categories, tags = [], []
+        for md_path in md_paths:
+            parser = MarkdownParser(markdown_file=md_path)
+            categories.extend(parser.get_categories())
+            tags.extend(parser.get_tags())
+        await asyncio.gather(
+            self.resolve_terms_batch(categories, 'categories'),
+            self.resolve_terms_batch(tags, 'tags')
+        )
+        
+        return list(await asyncio.gather(*(
+            self.publish_post(md_path, status=status, use_elementor=use_elementor)
+            for md_path in md_paths
+        )))